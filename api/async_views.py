@@ -0,0 +1,181 @@
+"""
+Async counterparts of the read-heavy views in api/views.py, served under
+/api/async/. Under ASGI a sync view occupies a worker thread for its whole
+duration; these run on the event loop and only hand the individual ORM and
+cache calls to Django's async APIs. Query building, serialization and
+response shape are shared with the sync views, so both stacks return the
+same payloads.
+"""
+
+from functools import wraps
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .auth import acache_user, aget_cached_user, check_revoked
+from .cache import aget_post_payload, apost_version
+from .pagination import KeysetPagination, MergedKeysetPagination
+from .serializers import PostSerializer, PostSummarySerializer, aattach_my_votes
+from .throttling import acheck_throttles
+from .views import (
+    GetPosts,
+    UserActivityView,
+    detail_etag,
+    detail_variant,
+    post_detail_queryset,
+    set_detail_headers,
+)
+
+_jwt = JWTAuthentication()
+
+
+async def authenticate(request):
+    """
+    Set ``request.user`` from the JWT bearer token the way
+    CachedJWTAuthentication does for the sync views, loading the user
+    through the async cache and ORM. Requests without a token are anonymous.
+    """
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        request.user = AnonymousUser()
+        return
+
+    token = _jwt.get_validated_token(raw_token)
+    try:
+        user_id = token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken('Token contained no recognizable user identification')
+    user = await aget_cached_user(user_id)
+    if user is None:
+        user = await User.objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).afirst()
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        check_revoked(user, token)
+        await acache_user(user)
+    else:
+        check_revoked(user, token)
+    request.user = user
+
+
+def _error(exc, status):
+    detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+    return JsonResponse(detail, status=status)
+
+
+def async_read_view(require_auth=False):
+    """
+    Wrap an async GET view with JWT authentication, the default throttles
+    and the DRF error responses the sync views would give.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return JsonResponse(
+                    {'detail': f'Method "{request.method}" not allowed.'}, status=405
+                )
+            try:
+                await authenticate(request)
+            except (AuthenticationFailed, InvalidToken) as exc:
+                return _error(exc, 401)
+            if require_auth and not request.user.is_authenticated:
+                return JsonResponse(
+                    {'detail': 'Authentication credentials were not provided.'},
+                    status=401,
+                )
+            throttled = await acheck_throttles(request)
+            if throttled is not None:
+                return throttled
+            try:
+                return await view(request, *args, **kwargs)
+            except NotFound as exc:
+                return _error(exc, 404)
+
+        return wrapper
+
+    return decorator
+
+
+@async_read_view(require_auth=True)
+async def get_posts(request):
+    """Async GetPosts."""
+    try:
+        posts, ordering, expand = GetPosts.feed_query(request)
+    except ValueError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    paginator = KeysetPagination(ordering=ordering)
+    page = await paginator.apaginate_queryset(posts, request)
+    data = PostSummarySerializer(
+        page, many=True, context={'request': request, 'expand': expand}
+    ).data
+    await aattach_my_votes(request.user, posts=data)
+    return JsonResponse(paginator.get_paginated_data(data))
+
+
+@async_read_view()
+async def get_post(request, pk):
+    """Async RefreshPost/GetComments, sharing their cache entries."""
+    variant = detail_variant(request)
+    version = await apost_version(pk)
+    token, modified_at = version
+    etag = detail_etag(request, token, variant)
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(modified_at)
+    )
+    if not_modified is not None:
+        return not_modified
+
+    async def build():
+        post = await post_detail_queryset().filter(pk=pk).afirst()
+        if post is None:
+            raise NotFound('No Post matches the given query.')
+        expand = set(variant.split(',')) - {''}
+        return PostSerializer(
+            post, context={'request': request, 'expand': expand}
+        ).data
+
+    data, hit = await aget_post_payload(pk, build, version=version, variant=variant)
+    await aattach_my_votes(request.user, posts=[data])
+    return set_detail_headers(JsonResponse(data), etag, modified_at, hit)
+
+
+@async_read_view(require_auth=True)
+async def user_activity(request, username):
+    """Async UserActivityView."""
+    posts, comments, context = UserActivityView.sources(request, username)
+
+    if request.GET.get('mode') == 'stream':
+        paginator = MergedKeysetPagination()
+        page = await paginator.apaginate_querysets(
+            {'post': posts, 'comment': comments}, request
+        )
+        data, post_items, comment_items = UserActivityView.stream_data(
+            paginator, page, context
+        )
+        empty = not page
+    else:
+        post_paginator, comment_paginator = UserActivityView.split_paginators()
+        post_page = await post_paginator.apaginate_queryset(posts, request)
+        comment_page = await comment_paginator.apaginate_queryset(comments, request)
+        data, post_items, comment_items = UserActivityView.split_data(
+            post_paginator, post_page, comment_paginator, comment_page, context
+        )
+        empty = not post_page and not comment_page
+    await aattach_my_votes(request.user, posts=post_items, comments=comment_items)
+
+    if empty and not await User.objects.filter(username=username).aexists():
+        return JsonResponse({"error": "User not found"}, status=404)
+
+    return JsonResponse(data)
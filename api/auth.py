@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def _cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+
+
+# What is cached of a user: enough for the request user and the permission
+# checks. Anything else (e.g. the email) is loaded on first access.
+CACHED_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def _user_key(user_id):
+    return f'auth-user-fields:{user_id}'
+
+
+def _to_cache(user):
+    """
+    The cache entry for ``user``. It never holds the password hash, which
+    would end up in a cache shared by all workers; only the digest of it
+    that tokens carry when CHECK_REVOKE_TOKEN is on.
+    """
+    entry = {name: getattr(user, name) for name in CACHED_FIELDS}
+    if api_settings.CHECK_REVOKE_TOKEN:
+        entry['revoke_hash'] = get_md5_hash_password(user.password)
+    return entry
+
+
+def _from_cache(entry):
+    """The user of a cache entry, its other fields deferred."""
+    model = get_user_model()
+    # from_db() takes the values in the order of the model's fields
+    names = [f.attname for f in model._meta.concrete_fields if f.attname in entry]
+    user = model.from_db(DEFAULT_DB_ALIAS, names, [entry[name] for name in names])
+    user._revoke_hash = entry.get('revoke_hash')
+    return user
+
+
+def invalidate_user(user_id):
+    """
+    Drop the cached user, now and again once the current transaction
+    commits so a concurrent request cannot re-cache the old row in between.
+    Saving or deleting a User does this through signals; call it after
+    writes that bypass them (``QuerySet.update()``).
+    """
+    key = _user_key(user_id)
+    _cache().delete(key)
+    transaction.on_commit(lambda: _cache().delete(key))
+
+
+def check_revoked(user, validated_token):
+    """The password-change check JWTAuthentication makes, if enabled."""
+    if not api_settings.CHECK_REVOKE_TOKEN:
+        return
+    password_hash = user.__dict__.get('_revoke_hash')
+    if password_hash is None:
+        password_hash = get_md5_hash_password(user.password)
+    if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+        raise AuthenticationFailed(
+            "The user's password has been changed.", code='password_changed'
+        )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the token's user (its CACHED_FIELDS) in the
+    cache for AUTH_USER_CACHE_TIMEOUT seconds instead of loading it on every
+    request.
+    Only users that passed the full check (found and active) are cached, and
+    the entry is dropped whenever the user is saved or deleted.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = _user_key(user_id)
+        entry = _cache().get(key)
+        if entry is None:
+            user = super().get_user(validated_token)
+            _cache().set(key, _to_cache(user), _timeout())
+            return user
+        user = _from_cache(entry)
+        check_revoked(user, validated_token)
+        return user
+
+
+async def aget_cached_user(user_id):
+    """The cached user for ``user_id``, or None; for the async views."""
+    entry = await _cache().aget(_user_key(user_id))
+    return _from_cache(entry) if entry is not None else None
+
+
+async def acache_user(user):
+    user_id = getattr(user, api_settings.USER_ID_FIELD)
+    await _cache().aset(_user_key(user_id), _to_cache(user), _timeout())
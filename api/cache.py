@@ -0,0 +1,166 @@
+import math
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+HITS_KEY = 'post-cache:hits'
+MISSES_KEY = 'post-cache:misses'
+
+
+def _cache():
+    return caches[getattr(settings, 'POST_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'POST_CACHE_TIMEOUT', 300)
+
+
+def _version_timeout():
+    # Never shorter than the payloads: an evicted version is simply replaced
+    # by a new token (retiring its payloads), but one kept forever would
+    # leave a key behind for every id ever requested
+    return max(getattr(settings, 'POST_CACHE_VERSION_TIMEOUT', 3600), _timeout())
+
+
+def _version_key(post_id):
+    return f'post-cache:version:{post_id}'
+
+
+def _new_version(previous=None):
+    # Whole seconds, as HTTP dates have them, and strictly after the version
+    # replaced: otherwise a change within the same second as the previous
+    # one would keep its Last-Modified and get 304s for If-Modified-Since
+    modified_at = math.ceil(time.time())
+    if previous is not None:
+        modified_at = max(modified_at, previous[1] + 1)
+    return (uuid4().hex, modified_at)
+
+
+def _current_version(cache, post_id):
+    """
+    Return the post's ``(token, modified_at)`` cache version, creating one if
+    it was never set or got evicted. Payloads are stored under the token, so
+    bumping it retires every earlier payload at once.
+    """
+    key = _version_key(post_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), _version_timeout())
+        version = cache.get(key)
+    return version
+
+
+async def _acurrent_version(cache, post_id):
+    key = _version_key(post_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _new_version(), _version_timeout())
+        version = await cache.aget(key)
+    return version
+
+
+def post_version(post_id):
+    """
+    Return the ``(token, modified_at)`` pair that changes whenever the post,
+    its comments or any of their votes change. It doubles as a cheap HTTP
+    validator: ``modified_at`` is never earlier than the last change, since a
+    fresh version (first use or after eviction) is stamped with the current
+    time, and each change moves it on by at least a second.
+    """
+    return _current_version(_cache(), post_id)
+
+
+async def apost_version(post_id):
+    """post_version() for async views."""
+    return await _acurrent_version(_cache(), post_id)
+
+
+def _count(cache, key):
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+async def _acount(cache, key):
+    if not await cache.aadd(key, 1, None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, None)
+
+
+def _payload_key(post_id, token, variant):
+    return f'post-cache:payload:{post_id}:{token}:{variant}'
+
+
+def get_post_payload(post_id, build, version=None, variant=''):
+    """
+    Return ``(data, hit)`` for the serialized post ``post_id``, calling
+    ``build()`` and caching its result on a miss. Pass the ``version`` the
+    caller already read to keep payload and validators consistent, and a
+    ``variant`` to cache differently shaped payloads (e.g. expanded) apart.
+    """
+    cache = _cache()
+    token, _ = version or _current_version(cache, post_id)
+    key = _payload_key(post_id, token, variant)
+    data = cache.get(key)
+    if data is not None:
+        _count(cache, HITS_KEY)
+        return data, True
+
+    _count(cache, MISSES_KEY)
+    data = build()
+    cache.set(key, data, _timeout())
+    return data, False
+
+
+async def aget_post_payload(post_id, build, version=None, variant=''):
+    """get_post_payload() for async views; ``build`` is a coroutine function."""
+    cache = _cache()
+    token, _ = version or await _acurrent_version(cache, post_id)
+    key = _payload_key(post_id, token, variant)
+    data = await cache.aget(key)
+    if data is not None:
+        await _acount(cache, HITS_KEY)
+        return data, True
+
+    await _acount(cache, MISSES_KEY)
+    data = await build()
+    await cache.aset(key, data, _timeout())
+    return data, False
+
+
+def invalidate_post(*post_ids):
+    """
+    Retire the cached payloads of ``post_ids`` once the current transaction
+    commits, so a concurrent reader cannot re-cache the pre-commit state.
+    """
+
+    def bump():
+        cache = _cache()
+        keys = [_version_key(pk) for pk in post_ids]
+        previous = cache.get_many(keys)
+        cache.set_many(
+            {key: _new_version(previous.get(key)) for key in keys},
+            _version_timeout(),
+        )
+
+    if post_ids:
+        transaction.on_commit(bump)
+
+
+def cache_stats():
+    cache = _cache()
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else None,
+    }
@@ -0,0 +1,119 @@
+import asyncio
+import itertools
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    A client's interest in a set of posts. Events are queued on the event
+    loop that created the subscription; when a slow client lets the queue
+    fill up, the oldest events are dropped (vote counts are absolute, so
+    the next one supersedes them anyway).
+    """
+
+    def __init__(self, post_ids, queue_size):
+        self.post_ids = frozenset(post_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+
+    def deliver(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """Return the next event, or None if none arrived within ``timeout``."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    """
+    Fan events out to the subscriptions of the current process. Only
+    clients connected to the same process see an event, so deployments
+    with several workers should point EVENT_BROKER at a broker backed by a
+    shared pub/sub service implementing the same three methods.
+
+    ``publish()`` may be called from any thread; ``subscribe()`` must be
+    called from the event loop that will consume the subscription.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+        self._ids = itertools.count(1)
+
+    def subscribe(self, post_ids):
+        subscription = Subscription(post_ids, self.queue_size)
+        with self._lock:
+            for post_id in subscription.post_ids:
+                self._subscriptions.setdefault(post_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for post_id in subscription.post_ids:
+                subscribers = self._subscriptions.get(post_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[post_id]
+
+    def publish(self, post_id, event_type, data):
+        event = {
+            'id': next(self._ids),
+            'event': event_type,
+            'post_id': post_id,
+            'data': data,
+        }
+        with self._lock:
+            subscribers = list(self._subscriptions.get(post_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop is gone without unsubscribing
+                self.unsubscribe(subscription)
+
+
+@lru_cache
+def _load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    path = getattr(settings, 'EVENT_BROKER', 'api.events.InProcessBroker')
+    return _load_broker(path)
+
+
+def publish_event(post_id, event_type, data):
+    """Publish an event about ``post_id`` once the current transaction commits."""
+    transaction.on_commit(lambda: get_broker().publish(post_id, event_type, data))
+
+
+def vote_event_data(target, object_id, counters):
+    return {
+        'target': target,
+        'id': object_id,
+        'upvotes': counters['upvote_count'],
+        'downvotes': counters['downvote_count'],
+        'total_votes': counters['score'],
+    }
+
+
+def format_event(event):
+    """Render a broker event as a server-sent event."""
+    data = json.dumps(
+        {'post_id': event['post_id'], **event['data']}, cls=DjangoJSONEncoder
+    )
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
@@ -0,0 +1,138 @@
+import logging
+import os
+from io import BytesIO
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework.exceptions import ValidationError
+
+from .models import UserProfile
+from .tasks import submit
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+
+
+def _setting(name, default):
+    return getattr(settings, f'PROFILE_PICTURE_{name}', default)
+
+
+def variant_sizes():
+    """``{name: edge length in px}`` of the square variants to generate."""
+    return _setting('SIZES', {'small': 64, 'medium': 256, 'large': 512})
+
+
+def validate_upload(upload):
+    """
+    Reject uploads that are too large, are not a supported image format or
+    would decode into an excessive number of pixels (decompression bombs).
+    Only the header is parsed here; decoding happens in the worker.
+    """
+    max_bytes = _setting('MAX_UPLOAD_SIZE', 5 * 1024 * 1024)
+    if upload.size > max_bytes:
+        raise ValidationError(
+            {'profile_picture': f'Image must be at most {max_bytes // 1024} KB.'}
+        )
+    try:
+        with Image.open(upload) as image:
+            image_format, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValidationError({'profile_picture': 'Upload a valid image.'})
+    finally:
+        upload.seek(0)
+    if image_format not in ALLOWED_FORMATS:
+        raise ValidationError(
+            {'profile_picture': f'Unsupported image format {image_format}.'}
+        )
+    if width * height > _setting('MAX_PIXELS', 25_000_000):
+        raise ValidationError({'profile_picture': 'Image dimensions are too large.'})
+
+
+def _encode(image):
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=85, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def render_variants(source):
+    """
+    Decode ``source`` once and return ``{name: jpeg bytes}``: the capped,
+    metadata-free original plus a square crop per variant size.
+    """
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        original = image.copy()
+        max_edge = _setting('MAX_EDGE', 1024)
+        original.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        rendered = {'original': _encode(original)}
+        for name, edge in variant_sizes().items():
+            rendered[name] = _encode(ImageOps.fit(image, (edge, edge), Image.LANCZOS))
+    return rendered
+
+
+def process_profile_picture(profile_id, upload_name):
+    """
+    Re-encode the uploaded original ``upload_name`` of a profile into its
+    variants. A job whose upload was replaced in the meantime only cleans
+    up after itself.
+    """
+    try:
+        with default_storage.open(upload_name) as source:
+            rendered = render_variants(source)
+    except Exception:
+        logger.exception('Could not process profile picture %s', upload_name)
+        UserProfile.objects.filter(pk=profile_id, profile_picture=upload_name).update(
+            profile_picture_status=UserProfile.PICTURE_FAILED
+        )
+        return
+
+    directory = os.path.dirname(upload_name)
+    prefix = uuid4().hex[:12]
+    saved = {
+        name: default_storage.save(f'{directory}/{prefix}_{name}.jpg', content)
+        for name, content in rendered.items()
+    }
+    original = saved.pop('original')
+    updated = UserProfile.objects.filter(
+        pk=profile_id, profile_picture=upload_name
+    ).update(
+        profile_picture=original,
+        profile_picture_variants=saved,
+        profile_picture_status=UserProfile.PICTURE_READY,
+    )
+    delete_files([upload_name] if updated else [original, *saved.values()])
+
+
+def delete_files(names):
+    for name in names:
+        if name:
+            default_storage.delete(name)
+
+
+def replace_profile_picture(profile, upload):
+    """
+    Save ``profile`` with ``upload`` (checked by validate_upload()) as its
+    picture, marked pending, and schedule its processing and the removal of
+    the previous files once the transaction commits.
+    """
+    previous = [
+        profile.profile_picture.name,
+        *profile.profile_picture_variants.values(),
+    ]
+    profile.profile_picture.save(upload.name, upload, save=False)
+    profile.profile_picture_variants = {}
+    profile.profile_picture_status = UserProfile.PICTURE_PENDING
+    profile.save()
+
+    upload_name = profile.profile_picture.name
+    transaction.on_commit(
+        lambda: submit(process_profile_picture, profile.pk, upload_name)
+    )
+    transaction.on_commit(lambda: submit(delete_files, previous))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.export import EXPORTS, export_lines, parse_kinds
+
+
+class Command(BaseCommand):
+    help = (
+        'Write posts, comments and votes as NDJSON (one JSON object per line) '
+        'to stdout or a file. The watermark to pass as --since next time is '
+        'printed to stderr.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--types',
+            default=','.join(EXPORTS),
+            help='Comma-separated types to export (default: all of them).',
+        )
+        parser.add_argument(
+            '--since',
+            help='Only rows changed at or after this ISO 8601 date and time.',
+        )
+        parser.add_argument('--output', help='File to write instead of stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            kinds = parse_kinds(options['types'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since: {options['since']}")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        watermark = timezone.now()
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.writelines(export_lines(kinds, since))
+        else:
+            for line in export_lines(kinds, since):
+                self.stdout.write(line, ending='')
+        self.stderr.write(f'Watermark: {watermark.isoformat()}')
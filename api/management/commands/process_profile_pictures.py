@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from api.images import process_profile_picture
+from api.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the size variants of profile pictures that have none yet, '
+        'such as those uploaded before variants existed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Also reprocess pictures whose processing failed.',
+        )
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.exclude(profile_picture='').exclude(
+            profile_picture__isnull=True
+        )
+        statuses = ['', UserProfile.PICTURE_PENDING]
+        if options['retry_failed']:
+            statuses.append(UserProfile.PICTURE_FAILED)
+        profiles = profiles.filter(profile_picture_status__in=statuses)
+
+        processed = 0
+        pictures = profiles.values_list('pk', 'profile_picture')
+        for profile_id, name in pictures.iterator():
+            process_profile_picture(profile_id, name)
+            processed += 1
+        self.stdout.write(f'Processed {processed} profile pictures.')
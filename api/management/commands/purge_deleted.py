@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import PurgeJob
+from api.purge import run_purge_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the purge jobs of deleted users and posts that have not finished, '
+        'such as those lost when a worker process exited.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=30,
+            help='Restart running jobs that made no progress for this long.',
+        )
+
+    def handle(self, *args, **options):
+        stale = timezone.now() - timedelta(minutes=options['stale_minutes'])
+        PurgeJob.objects.filter(
+            status=PurgeJob.RUNNING, updated_at__lt=stale
+        ).update(status=PurgeJob.PENDING)
+
+        jobs = PurgeJob.objects.filter(
+            status__in=[PurgeJob.PENDING, PurgeJob.FAILED]
+        ).order_by('created_at')
+        job_ids = list(jobs.values_list('pk', flat=True))
+        for job_id in job_ids:
+            run_purge_job(job_id)
+        failed = PurgeJob.objects.filter(pk__in=job_ids, status=PurgeJob.FAILED)
+        self.stdout.write(
+            f'Ran {len(job_ids)} purge jobs, {failed.count()} failed.'
+        )
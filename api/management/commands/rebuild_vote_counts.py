@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Post, Comment, Vote
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored upvote/downvote/score counters from the Vote table.'
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            updated = Vote.objects.rebuild_counters(model)
+            self.stdout.write(
+                f'Rebuilt vote counters for {updated} {model._meta.verbose_name_plural}.'
+            )
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Post
+from api.ranking import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored hot and controversial rankings of posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Only refresh posts created in the last N days (default: all).',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options['days'] is not None:
+            posts = posts.filter(
+                created_at__gte=timezone.now() - timedelta(days=options['days'])
+            )
+        updated = refresh_rankings(posts, batch_size=options['batch_size'])
+        self.stdout.write(f'Refreshed rankings for {updated} posts.')
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:32
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_counters(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Vote = apps.get_model('api', 'Vote')
+
+    for model_name in ('post', 'comment'):
+        model = apps.get_model('api', model_name)
+        content_type = ContentType.objects.filter(
+            app_label='api', model=model_name
+        ).first()
+        if content_type is None:
+            continue
+
+        def count(value):
+            votes = (
+                Vote.objects.filter(
+                    content_type=content_type, object_id=OuterRef('pk'), value=value
+                )
+                .order_by()
+                .values('object_id')
+                .annotate(total=Count('pk'))
+                .values('total')
+            )
+            return Coalesce(Subquery(votes), 0)
+
+        model.objects.update(upvote_count=count(1), downvote_count=count(-1))
+        model.objects.update(score=F('upvote_count') - F('downvote_count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_alter_userprofile_bio_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='downvote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='downvote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_vote_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_follow_counts(apps, schema_editor):
+    Follow = apps.get_model('api', 'Follow')
+    UserProfile = apps.get_model('api', 'UserProfile')
+
+    for field, column in (
+        ('followers_count', 'following'),
+        ('following_count', 'follower'),
+    ):
+        counts = Follow.objects.values(column).annotate(total=Count('pk'))
+        for row in counts.iterator():
+            UserProfile.objects.update_or_create(
+                user_id=row[column], defaults={field: row['total']}
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_access_pattern_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'created_at', 'post'], name='timeline_user_created_idx')],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(backfill_follow_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+from api.ranking import refresh_rankings
+
+
+def backfill_rankings(apps, schema_editor):
+    refresh_rankings(apps.get_model('api', 'Post').objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_follow_timeline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='controversy',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['hot_score', 'id'], name='post_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['score', 'id'], name='post_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['controversy', 'id'], name='post_controversial_idx'),
+        ),
+        migrations.RunPython(backfill_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Full-text index over Post title/content/category/keywords (see api/search.py)
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE api_post_fts USING fts5(
+        title, content, category, keywords,
+        content='api_post', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER api_post_fts_insert AFTER INSERT ON api_post BEGIN
+        INSERT INTO api_post_fts(rowid, title, content, category, keywords)
+        VALUES (new.id, new.title, new.content, new.category, new.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER api_post_fts_delete AFTER DELETE ON api_post BEGIN
+        INSERT INTO api_post_fts(api_post_fts, rowid, title, content, category, keywords)
+        VALUES ('delete', old.id, old.title, old.content, old.category, old.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER api_post_fts_update
+    AFTER UPDATE OF title, content, category, keywords ON api_post BEGIN
+        INSERT INTO api_post_fts(api_post_fts, rowid, title, content, category, keywords)
+        VALUES ('delete', old.id, old.title, old.content, old.category, old.keywords);
+        INSERT INTO api_post_fts(rowid, title, content, category, keywords)
+        VALUES (new.id, new.title, new.content, new.category, new.keywords);
+    END
+    """,
+    "INSERT INTO api_post_fts(api_post_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS api_post_fts_update',
+    'DROP TRIGGER IF EXISTS api_post_fts_delete',
+    'DROP TRIGGER IF EXISTS api_post_fts_insert',
+    'DROP TABLE IF EXISTS api_post_fts',
+]
+
+# Must stay identical to api.search.POSTGRES_DOCUMENT for the index to be used
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX post_search_idx ON api_post USING GIN ((
+        setweight(to_tsvector('english', title), 'A') ||
+        setweight(to_tsvector('english', keywords), 'B') ||
+        setweight(to_tsvector('english', category), 'B') ||
+        setweight(to_tsvector('english', content), 'C')
+    ))
+    """,
+]
+
+POSTGRES_BACKWARD = ['DROP INDEX IF EXISTS post_search_idx']
+
+
+def run(statements_by_vendor):
+    def apply(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_post_rankings'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
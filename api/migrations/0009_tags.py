@@ -0,0 +1,95 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def parse_keywords(keywords, max_length):
+    # api.tags.parse_keywords() as of this migration
+    names = []
+    for name in (keywords or '').split(','):
+        name = ' '.join(name.split()).lower()[:max_length]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill_tags(apps, schema_editor):
+    Post = apps.get_model('api', 'Post')
+    Tag = apps.get_model('api', 'Tag')
+    CategoryCount = apps.get_model('api', 'CategoryCount')
+    PostTag = Post.tags.through
+    max_length = Tag._meta.get_field('name').max_length
+
+    tag_ids = {}
+    rows = Post.objects.values_list('pk', 'keywords').order_by('pk')
+    for pk, keywords in rows.iterator(chunk_size=2000):
+        names = parse_keywords(keywords, max_length)
+        new = [name for name in names if name not in tag_ids]
+        if new:
+            Tag.objects.bulk_create([Tag(name=name) for name in new])
+            tag_ids.update(
+                Tag.objects.filter(name__in=new).values_list('name', 'pk')
+            )
+        PostTag.objects.bulk_create(
+            [PostTag(post_id=pk, tag_id=tag_ids[name]) for name in names]
+        )
+
+    counts = (
+        PostTag.objects.filter(tag=OuterRef('pk'))
+        .order_by()
+        .values('tag')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Tag.objects.update(post_count=Coalesce(Subquery(counts), 0))
+    CategoryCount.objects.bulk_create(
+        CategoryCount(name=row['category'], post_count=row['total'])
+        for row in Post.objects.exclude(category='')
+        .order_by()
+        .values('category')
+        .annotate(total=Count('pk'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-post_count', 'name'], name='category_post_count_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-post_count', 'name'], name='tag_post_count_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='posts', to='api.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='post_category_created_idx'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'score', 'id'], name='comment_post_top_idx'),
+        ),
+    ]
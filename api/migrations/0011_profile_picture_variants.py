@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-17 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='profile_picture_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-17 23:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_soft_delete_purge_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='created_at',
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='vote',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['updated_at'], name='comment_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['updated_at'], name='post_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['updated_at'], name='vote_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:12
+
+from importlib import import_module
+
+from django.conf import settings
+from django.db import migrations, models
+
+search_index = import_module('api.migrations.0008_post_search_index')
+
+
+def mark_fanned_out(apps, schema_editor):
+    # Until now the posts of authors at or under the limit were fanned out
+    # and the others were merged in on read
+    Post = apps.get_model('api', 'Post')
+    limit = getattr(settings, 'TIMELINE_FANOUT_LIMIT', 5000)
+    Post._base_manager.exclude(
+        author__userprofile__followers_count__gt=limit
+    ).update(fanned_out=True)
+
+
+def restore_search_triggers(apps, schema_editor):
+    # SQLite may change the column by rebuilding api_post, which drops the
+    # full-text index triggers of 0008 along with the old table
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    statements = search_index.SQLITE_BACKWARD + search_index.SQLITE_FORWARD
+    for statement in statements:
+        if 'TRIGGER' in statement:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_export_watermarks'),
+    ]
+
+    operations = [
+        # Unapplying drops the column, possibly the same way; restore after it
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='fanned_out',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(mark_fanned_out, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(
+                condition=models.Q(('fanned_out', False)),
+                fields=['author', 'created_at', 'id'],
+                name='post_unfanned_idx',
+            ),
+        ),
+    ]
@@ -1,18 +1,102 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.utils import timezone
+
+from .ranking import ranking_for
 
 
 class UserProfile(models.Model):
+    PICTURE_PENDING = 'pending'
+    PICTURE_READY = 'ready'
+    PICTURE_FAILED = 'failed'
+    PICTURE_STATUS_CHOICES = (
+        (PICTURE_PENDING, 'Pending'),
+        (PICTURE_READY, 'Ready'),
+        (PICTURE_FAILED, 'Failed'),
+    )
+
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    # Resized copies of profile_picture by size name, rendered off-request
+    # by api.images
+    profile_picture_variants = models.JSONField(default=dict, blank=True)
+    profile_picture_status = models.CharField(
+        max_length=10, choices=PICTURE_STATUS_CHOICES, blank=True
+    )
+    # Denormalized follow counts, maintained by api.timeline.follow()/unfollow()
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.user.username}'s profile"
 
 
+class Tag(models.Model):
+    """A normalized post keyword; see api.tags for how posts are tagged."""
+
+    name = models.CharField(max_length=50, unique=True)
+    # Denormalized, maintained by api.tags alongside Post.tags
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Tag cloud: most used first
+            models.Index(fields=['-post_count', 'name'], name='tag_post_count_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class CategoryCount(models.Model):
+    """Number of posts per `Post.category`, maintained by api.tags."""
+
+    name = models.CharField(max_length=100, unique=True)
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-post_count', 'name'], name='category_post_count_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.post_count})'
+
+
+class LiveManager(models.Manager):
+    """
+    Default manager that hides soft-deleted rows (``deleted_at`` set). They
+    stay reachable through ``all_objects`` until api.purge removes them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class PostQuerySet(models.QuerySet):
+    def with_comments_count(self):
+        """
+        Annotate `comments_count` with a correlated subquery, which is only
+        evaluated for the rows actually returned (unlike a JOIN + GROUP BY
+        over the whole table before LIMIT).
+        """
+        comments = (
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return self.annotate(comments_count=Coalesce(Subquery(comments), 0))
+
+
 class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
@@ -21,27 +105,84 @@ class Post(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     category = models.CharField(max_length=100, blank=True)
     keywords = models.CharField(max_length=200, blank=True)
+    # `keywords` parsed into tags whenever the post is saved (api.tags)
+    tags = models.ManyToManyField(Tag, related_name='posts', blank=True)
     votes = GenericRelation('Vote', related_query_name='post_votes_set')
 
+    # Precomputed rankings (see api/ranking.py), refreshed on every vote
+    hot_score = models.FloatField(default=0)
+    controversy = models.FloatField(default=0)
+    # Set when the post (or its author) is deleted; see api.purge
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    # Whether it was copied into its followers' timelines when created; the
+    # others are merged into timelines on read (see api/timeline.py)
+    fanned_out = models.BooleanField(default=False)
+
+    objects = LiveManager.from_queryset(PostQuerySet)()
+    all_objects = models.Manager.from_queryset(PostQuerySet)()
+
+    # Fields VoteManager reads back to recompute the rankings after a vote
+    RANKING_INPUTS = ('created_at',)
+    # Denormalized vote counters, maintained by VoteManager
+    upvote_count = models.PositiveIntegerField(default=0)
+    downvote_count = models.PositiveIntegerField(default=0)
+    score = models.IntegerField(default=0)
+
     @property
     def upvotes(self):
-        return Vote.objects.filter(
-            content_type=ContentType.objects.get_for_model(Post),
-            object_id=self.id,
-            value=1,
-        ).count()
+        return self.upvote_count
 
     @property
     def downvotes(self):
-        return Vote.objects.filter(
-            content_type=ContentType.objects.get_for_model(Post),
-            object_id=self.id,
-            value=-1,
-        ).count()
+        return self.downvote_count
 
     @property
     def total_votes(self):
-        return self.upvotes - self.downvotes
+        return self.score
+
+    class Meta:
+        # Comments and timeline entries still resolve a post being purged
+        base_manager_name = 'all_objects'
+        indexes = [
+            # Feed keyset pagination: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['created_at', 'id'], name='post_created_idx'),
+            # UserActivityView: posts by author, newest first
+            models.Index(
+                fields=['author', 'created_at', 'id'], name='post_author_created_idx'
+            ),
+            # ?sort=hot|top|controversial keyset pages
+            models.Index(fields=['hot_score', 'id'], name='post_hot_idx'),
+            models.Index(fields=['score', 'id'], name='post_top_idx'),
+            models.Index(fields=['controversy', 'id'], name='post_controversial_idx'),
+            # ?category= feed pages
+            models.Index(
+                fields=['category', 'created_at', 'id'], name='post_category_created_idx'
+            ),
+            # Incremental exports (api.export)
+            models.Index(fields=['updated_at'], name='post_updated_idx'),
+            # Home timelines: posts of followed authors merged in on read
+            models.Index(
+                fields=['author', 'created_at', 'id'],
+                condition=Q(fanned_out=False),
+                name='post_unfanned_idx',
+            ),
+        ]
+
+    ranking_for = staticmethod(ranking_for)
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            # created_at is only filled in by the INSERT itself; the few
+            # microseconds of difference are irrelevant to the ranking
+            rankings = self.ranking_for(
+                upvote_count=self.upvote_count,
+                downvote_count=self.downvote_count,
+                score=self.score,
+                created_at=self.created_at or timezone.now(),
+            )
+            for name, value in rankings.items():
+                setattr(self, name, value)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -54,31 +195,323 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     votes = GenericRelation('Vote', related_query_name='comment_votes_set')
+    # Denormalized vote counters, maintained by VoteManager
+    upvote_count = models.PositiveIntegerField(default=0)
+    downvote_count = models.PositiveIntegerField(default=0)
+    score = models.IntegerField(default=0)
+    # Set when the comment's post or author is deleted; see api.purge
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
 
     @property
     def upvotes(self):
-        return Vote.objects.filter(
-            content_type=ContentType.objects.get_for_model(Comment),
-            object_id=self.id,
-            value=1,
-        ).count()
+        return self.upvote_count
 
     @property
     def downvotes(self):
-        return Vote.objects.filter(
-            content_type=ContentType.objects.get_for_model(Comment),
-            object_id=self.id,
-            value=-1,
-        ).count()
+        return self.downvote_count
 
     @property
     def total_votes(self):
-        return self.upvotes - self.downvotes
+        return self.score
+
+    class Meta:
+        base_manager_name = 'all_objects'
+        indexes = [
+            # Comment threads: comments of a post in creation order
+            models.Index(
+                fields=['post', 'created_at', 'id'], name='comment_post_created_idx'
+            ),
+            # Comment threads sorted by ?sort=top
+            models.Index(fields=['post', 'score', 'id'], name='comment_post_top_idx'),
+            # UserActivityView: comments by author, newest first
+            models.Index(
+                fields=['author', 'created_at', 'id'],
+                name='comment_author_created_idx',
+            ),
+            # Incremental exports (api.export)
+            models.Index(fields=['updated_at'], name='comment_updated_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.author.username} on {self.post.title}'
 
 
+class VoteManager(models.Manager):
+    COUNTER_FIELDS = ('upvote_count', 'downvote_count', 'score')
+
+    @staticmethod
+    def resolve(current, requested):
+        """
+        Return the vote value left after ``requested`` is applied on top of
+        ``current``. Repeating the same vote or sending ``None`` removes it.
+        """
+        if requested is None or requested == current:
+            return None
+        return requested
+
+    @staticmethod
+    def counter_deltas(old, new):
+        """Return the (upvote, downvote) deltas for a vote going from old to new."""
+        return (int(new == 1) - int(old == 1), int(new == -1) - int(old == -1))
+
+    def toggle(self, user, model, object_id, vote_type, **target_filter):
+        """
+        Apply ``vote_type`` for ``user`` on the ``model`` row ``object_id``
+        and return ``(new_value, counters)``.
+
+        The vote is changed with conditional single-row statements (flip,
+        delete, insert) whose affected-row counts tell us the previous value,
+        so no read-then-write race is possible. The target row is then locked
+        and its counters rewritten in the same transaction. Raises
+        ``model.DoesNotExist`` (and rolls back) when no row matches
+        ``object_id`` and ``target_filter``.
+        """
+        content_type = ContentType.objects.get_for_model(model)
+        votes = self.filter(user=user, content_type=content_type, object_id=object_id)
+        targets = model.objects.filter(pk=object_id, **target_filter)
+
+        with transaction.atomic():
+            current, new = self._apply_toggle(
+                votes, user, content_type, object_id, vote_type
+            )
+            # Lock the target row and derive the new counters (and rankings)
+            # from it, so a single UPDATE writes them all
+            ranking_inputs = getattr(model, 'RANKING_INPUTS', ())
+            counters = (
+                targets.select_for_update()
+                .values(*self.COUNTER_FIELDS, *ranking_inputs)
+                .first()
+            )
+            if counters is None:
+                raise model.DoesNotExist
+
+            up, down = self.counter_deltas(current, new)
+            if up or down:
+                counters['upvote_count'] += up
+                counters['downvote_count'] += down
+                counters['score'] += up - down
+                changes = {name: counters[name] for name in self.COUNTER_FIELDS}
+                if ranking_inputs:
+                    changes.update(model.ranking_for(**counters))
+                targets.update(**changes)
+            for name in ranking_inputs:
+                del counters[name]
+        return new, counters
+
+    def _apply_toggle(self, votes, user, content_type, object_id, vote_type):
+        """Return the (previous, new) vote values after applying the toggle."""
+        if vote_type is None:
+            for value in (1, -1):
+                if votes.filter(value=value).delete()[0]:
+                    return value, None
+            return None, None
+
+        # A concurrent request can insert the same vote between our checks;
+        # the unique constraint rejects it and we re-run the toggle on top.
+        for _ in range(3):
+            flipped = votes.filter(value=-vote_type).update(
+                value=vote_type, updated_at=timezone.now()
+            )
+            if flipped:
+                return -vote_type, vote_type
+            if votes.filter(value=vote_type).delete()[0]:
+                return vote_type, None
+            try:
+                with transaction.atomic():
+                    self.create(
+                        user=user,
+                        content_type=content_type,
+                        object_id=object_id,
+                        value=vote_type,
+                    )
+                return None, vote_type
+            except IntegrityError:
+                continue
+        raise IntegrityError('Could not apply vote after repeated conflicts.')
+
+    def toggle_many(self, user, operations):
+        """
+        Apply a sequence of ``(model, object_id, vote_type)`` toggles for
+        ``user`` with set-based queries in a single transaction.
+
+        Operations are folded in order with the same semantics as
+        ``toggle()``, so replaying a queue of clicks yields the same result as
+        sending them one by one. Targets that do not exist are skipped.
+        Returns ``(results, missing)`` where ``results`` maps each
+        ``(model, object_id)`` to ``(final_value, counters)``.
+        """
+        # A concurrent single vote can insert one of our rows first; the
+        # whole batch is then re-folded on top of the committed state.
+        for _ in range(3):
+            try:
+                with transaction.atomic():
+                    return self._toggle_many(user, operations)
+            except IntegrityError:
+                continue
+        raise IntegrityError('Could not apply votes after repeated conflicts.')
+
+    def _toggle_many(self, user, operations):
+        requested = {}
+        for model, object_id, _ in operations:
+            requested.setdefault(model, set()).add(object_id)
+
+        existing = {
+            model: set(
+                model.objects.filter(pk__in=ids).values_list('pk', flat=True)
+            )
+            for model, ids in requested.items()
+        }
+        content_types = ContentType.objects.get_for_models(*existing)
+
+        targets = models.Q(pk__in=[])
+        for model, ids in existing.items():
+            targets |= models.Q(content_type=content_types[model], object_id__in=ids)
+        stored = {
+            (vote.content_type_id, vote.object_id): vote
+            for vote in self.select_for_update().filter(targets, user=user)
+        }
+
+        # Fold the operations in order on top of the stored votes
+        final = {}
+        for model, object_id, vote_type in operations:
+            if object_id not in existing[model]:
+                continue
+            key = (model, object_id)
+            if key not in final:
+                vote = stored.get((content_types[model].pk, object_id))
+                final[key] = vote.value if vote else None
+            final[key] = self.resolve(final[key], vote_type)
+
+        deleted, updated, created = [], {1: [], -1: []}, []
+        deltas = {model: {} for model in existing}
+        for (model, object_id), new in final.items():
+            vote = stored.get((content_types[model].pk, object_id))
+            old = vote.value if vote else None
+            if old == new:
+                continue
+            if new is None:
+                deleted.append(vote.pk)
+            elif old is None:
+                created.append(
+                    self.model(
+                        user=user,
+                        content_type=content_types[model],
+                        object_id=object_id,
+                        value=new,
+                    )
+                )
+            else:
+                updated[new].append(vote.pk)
+            deltas[model][object_id] = self.counter_deltas(old, new)
+
+        if deleted:
+            self.filter(pk__in=deleted).delete()
+        for value, pks in updated.items():
+            if pks:
+                self.filter(pk__in=pks).update(value=value, updated_at=timezone.now())
+        if created:
+            self.bulk_create(created)
+
+        results = {}
+        for model, changes in deltas.items():
+            if changes:
+                self._shift_counters(model, changes)
+            ranking_inputs = getattr(model, 'RANKING_INPUTS', ())
+            touched = {object_id for m, object_id in final if m is model}
+            reranked = []
+            for row in model.objects.filter(pk__in=touched).values(
+                'pk', *self.COUNTER_FIELDS, *ranking_inputs
+            ):
+                object_id = row.pop('pk')
+                if ranking_inputs and object_id in changes:
+                    reranked.append((object_id, model.ranking_for(**row)))
+                for name in ranking_inputs:
+                    del row[name]
+                results[(model, object_id)] = (final[(model, object_id)], row)
+            if reranked:
+                model.objects.bulk_update(
+                    [model(pk=object_id, **ranks) for object_id, ranks in reranked],
+                    list(reranked[0][1]),
+                )
+
+        missing = [
+            (model, object_id)
+            for model, ids in requested.items()
+            for object_id in sorted(ids - existing[model])
+        ]
+        return results, missing
+
+    def _shift_counters(self, model, changes):
+        """Apply per-row (upvote, downvote) deltas to ``model`` in one UPDATE."""
+
+        def delta(index, sign=1):
+            return models.Case(
+                *(
+                    models.When(pk=object_id, then=models.Value(sign * d[index]))
+                    for object_id, d in changes.items()
+                    if d[index]
+                ),
+                default=models.Value(0),
+            )
+
+        model.objects.filter(pk__in=changes).update(
+            upvote_count=F('upvote_count') + delta(0),
+            downvote_count=F('downvote_count') + delta(1),
+            score=F('score') + delta(0) + delta(1, sign=-1),
+        )
+
+    def discard(self, votes):
+        """
+        Delete the ``votes`` queryset and take the votes off the counters of
+        their targets (rankings catch up on the next refresh_rankings).
+        Returns ``{model: object ids}`` of the targets whose counters changed.
+        """
+        deltas = {}
+        rows = list(votes.values_list('pk', 'content_type_id', 'object_id', 'value'))
+        for _, content_type_id, object_id, value in rows:
+            up, down = self.counter_deltas(value, None)
+            delta = deltas.setdefault(content_type_id, {}).setdefault(
+                object_id, [0, 0]
+            )
+            delta[0] += up
+            delta[1] += down
+
+        touched = {}
+        with transaction.atomic():
+            self.filter(pk__in=[row[0] for row in rows]).delete()
+            for content_type_id, changes in deltas.items():
+                model = ContentType.objects.get_for_id(content_type_id).model_class()
+                self._shift_counters(model, changes)
+                touched[model] = set(changes)
+        return touched
+
+    def rebuild_counters(self, model):
+        """Recompute the stored vote counters of every ``model`` row from Vote."""
+        content_type = ContentType.objects.get_for_model(model)
+
+        def count(value):
+            votes = (
+                self.filter(
+                    content_type=content_type, object_id=OuterRef('pk'), value=value
+                )
+                .order_by()
+                .values('object_id')
+                .annotate(total=Count('pk'))
+                .values('total')
+            )
+            return Coalesce(Subquery(votes), 0)
+
+        with transaction.atomic():
+            updated = model.objects.update(
+                upvote_count=count(1), downvote_count=count(-1)
+            )
+            model.objects.update(score=F('upvote_count') - F('downvote_count'))
+        return updated
+
+
 class Vote(models.Model):
     VOTE_CHOICES = (
         (1, 'Upvote'),
@@ -90,9 +523,23 @@ class Vote(models.Model):
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
     value = models.IntegerField(choices=VOTE_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set by VoteManager's set-based UPDATEs too; incremental exports use it
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VoteManager()
 
     class Meta:
         unique_together = ('user', 'content_type', 'object_id')
+        indexes = [
+            # Vote counts and GenericRelation prefetches filter on the target
+            # first; the unique index above leads with user and cannot help
+            models.Index(
+                fields=['content_type', 'object_id', 'value'], name='vote_target_idx'
+            ),
+            # Incremental exports (api.export)
+            models.Index(fields=['updated_at'], name='vote_updated_idx'),
+        ]
 
     def __str__(self):
         return f'Vote by {self.user.username} on {self.content_object} - {self.get_vote_type_display()}'
@@ -111,3 +558,70 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.follower.username} follows {self.following.username}'
+
+
+class TimelineEntry(models.Model):
+    """
+    A post fanned out to a follower's home timeline on write. `created_at`
+    copies the post's timestamp so pages are read straight off the
+    (user, created_at, post) index.
+    """
+
+    user = models.ForeignKey(
+        User, related_name='timeline_entries', on_delete=models.CASCADE
+    )
+    post = models.ForeignKey(Post, related_name='+', on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                fields=['user', 'created_at', 'post'], name='timeline_user_created_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post} in {self.user.username}\'s timeline'
+
+
+class PurgeJob(models.Model):
+    """
+    Background removal of a soft-deleted user or post and everything that
+    hangs off it, run by api.purge in chunks.
+    """
+
+    USER = 'user'
+    POST = 'post'
+    KIND_CHOICES = ((USER, 'User'), (POST, 'Post'))
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Not a foreign key: the target is gone once the job is done
+    target_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # Rows removed so far by model, e.g. {'comment': 120, 'vote': 800}
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # purge_deleted: unfinished jobs, oldest first
+            models.Index(fields=['status', 'created_at'], name='purgejob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'Purge {self.kind} {self.target_id} ({self.status})'
@@ -0,0 +1,369 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a fixed, unique ordering such as
+    ('-created_at', '-id').
+
+    Instead of an OFFSET, each cursor carries the ordering values of the last
+    row that was returned, so every page is a single indexed range query no
+    matter how deep the client scrolls.
+    """
+
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None, cursor_query_param=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if cursor_query_param is not None:
+            self.cursor_query_param = cursor_query_param
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.GET[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    # Cursor encoding
+
+    @property
+    def fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def encode_cursor(self, obj, reverse=False):
+        values = [getattr(obj, name) for name, _ in self.fields]
+        return self.encode_values(values, reverse)
+
+    def encode_values(self, values, reverse=False):
+        # isoformat() keeps full microsecond precision, which DjangoJSONEncoder
+        # would truncate and thereby skip or repeat rows at page boundaries.
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in values
+        ]
+        payload = json.dumps({'v': values, 'r': reverse})
+        return urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.GET.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode()).decode())
+            values = payload['v']
+            if len(values) != len(self.fields):
+                raise ValueError
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+            return values, bool(payload.get('r'))
+        except (
+            BinasciiError,
+            KeyError,
+            TypeError,
+            ValueError,
+            UnicodeDecodeError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def seek_filter(self, values, reverse=False):
+        """
+        Build the `WHERE` clause selecting rows strictly after ``values`` in
+        the pagination ordering (or strictly before when ``reverse``).
+        """
+        condition = Q()
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            clause = Q(**{f'{name}__{lookup}': values[index]})
+            for (prefix, _), value in zip(self.fields[:index], values):
+                clause &= Q(**{prefix: value})
+            condition |= clause
+        return condition
+
+    def reversed_ordering(self):
+        return [
+            name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering
+        ]
+
+    # Paging
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._finish_page(list(self._page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views, using the async ORM."""
+        queryset = self._page_queryset(queryset, request)
+        return self._finish_page([obj async for obj in queryset])
+
+    def _page_queryset(self, queryset, request):
+        """The unevaluated query for the requested page, plus one row."""
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request, queryset.model)
+        self._cursor_values, self._reverse = values, reverse
+
+        queryset = queryset.order_by(
+            *(self.reversed_ordering() if reverse else self.ordering)
+        )
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(values, reverse))
+        return queryset[: self.page_size_value + 1]
+
+    def _finish_page(self, rows):
+        values, reverse = self._cursor_values, self._reverse
+        has_more = len(rows) > self.page_size_value
+        rows = rows[: self.page_size_value]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.encode_cursor(self.page[0], reverse=True))
+
+    def _link(self, cursor):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class MergedKeysetPagination(KeysetPagination):
+    """
+    Forward-only keyset pagination over several querysets merged into one
+    stream, ordered by ``created_at`` DESC, then source, then ``id`` DESC.
+
+    Sources are given as an ordered mapping of ``{kind: queryset}``; earlier
+    kinds sort first on equal timestamps. Each page costs one range query
+    per source, each limited to the page size.
+    """
+
+    ordering = ('-created_at', '-id')
+
+    def decode_stream_cursor(self, request, kinds, model):
+        encoded = request.GET.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode()).decode())
+            kind = payload['k']
+            if kind not in kinds:
+                raise ValueError
+            created_at = model._meta.get_field('created_at').to_python(payload['t'])
+            return created_at, kinds.index(kind), int(payload['i'])
+        except (
+            BinasciiError,
+            KeyError,
+            TypeError,
+            ValueError,
+            UnicodeDecodeError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_stream_cursor(self, kind, obj):
+        payload = json.dumps(
+            {'k': kind, 't': obj.created_at.isoformat(), 'i': obj.pk}
+        )
+        return urlsafe_b64encode(payload.encode()).decode()
+
+    def paginate_querysets(self, sources, request, view=None):
+        """Return the next page as a list of ``(kind, obj)`` pairs."""
+        return self._merge(
+            [
+                (kind, list(queryset))
+                for kind, queryset in self._source_querysets(sources, request)
+            ]
+        )
+
+    async def apaginate_querysets(self, sources, request, view=None):
+        """paginate_querysets() for async views, using the async ORM."""
+        return self._merge(
+            [
+                (kind, [obj async for obj in queryset])
+                for kind, queryset in self._source_querysets(sources, request)
+            ]
+        )
+
+    def _source_querysets(self, sources, request):
+        self.request = request
+        self.page_size_value = size = self.get_page_size(request)
+        kinds = list(sources)
+        model = next(iter(sources.values())).model
+        cursor = self.decode_stream_cursor(request, kinds, model)
+
+        for rank, (kind, queryset) in enumerate(sources.items()):
+            queryset = queryset.order_by(*self.ordering)
+            if cursor is not None:
+                created_at, cursor_rank, cursor_id = cursor
+                if rank < cursor_rank:
+                    queryset = queryset.filter(created_at__lt=created_at)
+                elif rank > cursor_rank:
+                    queryset = queryset.filter(created_at__lte=created_at)
+                else:
+                    queryset = queryset.filter(
+                        Q(created_at__lt=created_at)
+                        | Q(created_at=created_at, pk__lt=cursor_id)
+                    )
+            yield kind, queryset[: size + 1]
+
+    def _merge(self, results):
+        size = self.page_size_value
+        rows = [
+            (obj.created_at, -rank, obj.pk, kind, obj)
+            for rank, (kind, objs) in enumerate(results)
+            for obj in objs
+        ]
+        rows.sort(key=lambda row: row[:3], reverse=True)
+        self.has_next = len(rows) > size
+        self.page = [(kind, obj) for *_, kind, obj in rows[:size]]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.encode_stream_cursor(*self.page[-1]))
+
+    def get_previous_link(self):
+        return None
+
+
+class UnionKeysetPagination(KeysetPagination):
+    """
+    Forward-only keyset pagination over the union of several ``values_list``
+    querysets that all yield the same ``(created_at, id)``-style keys, each
+    under its own column names, newest first. A key produced by more than one
+    source is returned once.
+    """
+
+    def paginate_querysets(self, sources, request, model, view=None):
+        """
+        ``sources`` is a list of ``(queryset, ordering)`` pairs; ``model``
+        supplies the field types used to decode cursors. Returns the page of
+        key tuples.
+        """
+        self.request = request
+        size = self.get_page_size(request)
+        values, _ = self.decode_cursor(request, model)
+
+        keys = set()
+        for queryset, ordering in sources:
+            source = KeysetPagination(ordering=ordering)
+            queryset = queryset.order_by(*ordering)
+            if values is not None:
+                queryset = queryset.filter(source.seek_filter(values))
+            keys.update(queryset[: size + 1])
+
+        keys = sorted(keys, reverse=True)
+        self.has_next = len(keys) > size
+        self.has_previous = False
+        self.page = keys[:size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.encode_values(self.page[-1]))
+
+
+class RankedPagination(KeysetPagination):
+    """
+    Page-number pagination for results ordered by a computed relevance rank,
+    which has no stored column to seek on. Pages are fetched one row long to
+    detect a next page, so no COUNT(*) over the matches is needed; depth is
+    capped because every page re-ranks the rows before it.
+    """
+
+    page_query_param = 'page'
+    max_page = 50
+    invalid_page_message = 'Invalid page'
+
+    def get_page_number(self, request):
+        try:
+            page = int(request.GET.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if not 1 <= page <= self.max_page:
+            raise NotFound(self.invalid_page_message)
+        return page
+
+    def paginate_results(self, fetch, request, view=None):
+        """
+        ``fetch(limit, offset)`` returns a list of ranked rows; returns the
+        rows of the requested page.
+        """
+        self.request = request
+        size = self.get_page_size(request)
+        self.page_number = self.get_page_number(request)
+        rows = fetch(size + 1, (self.page_number - 1) * size)
+        self.has_next = len(rows) > size and self.page_number < self.max_page
+        self.has_previous = self.page_number > 1
+        self.page = rows[:size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._page_link(self.page_number + 1)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._page_link(self.page_number - 1)
+
+    def _page_link(self, page):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, page)
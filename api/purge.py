@@ -0,0 +1,203 @@
+"""
+Deleting a user or a post soft-deletes it: the rows that would disappear
+are stamped with ``deleted_at`` (hidden by the default managers and search,
+and taken off the tag and category counts) in a few set-based UPDATEs, and
+a PurgeJob is queued. The job then removes them on
+the background pool in short, chunked transactions, dependents first, with
+one DELETE per model and chunk instead of Django's row-by-row cascade. The
+generic Vote rows that no foreign key cascades to are removed along the way.
+Each chunk commits together with the job's progress, so an interrupted job
+resumes where it stopped (see the purge_deleted command).
+"""
+
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .auth import invalidate_user
+from .cache import invalidate_post
+from .images import delete_files
+from .models import Comment, Follow, Post, PurgeJob, TimelineEntry, UserProfile, Vote
+from .tags import release_posts, unlink_posts
+from .tasks import submit
+
+logger = logging.getLogger(__name__)
+
+
+def _chunk_size():
+    return getattr(settings, 'PURGE_CHUNK_SIZE', 500)
+
+
+def _schedule(kind, target_id):
+    job = PurgeJob.objects.create(kind=kind, target_id=target_id)
+    transaction.on_commit(lambda: submit(run_purge_job, job.pk))
+    return job
+
+
+def delete_post(post):
+    """Soft-delete ``post`` with its comments and queue their PurgeJob."""
+    now = timezone.now()
+    with transaction.atomic():
+        posts = Post.objects.filter(pk=post.pk)
+        release_posts(posts)
+        posts.update(deleted_at=now)
+        Comment.objects.filter(post=post).update(deleted_at=now)
+        invalidate_post(post.pk)
+        return _schedule(PurgeJob.POST, post.pk)
+
+
+def delete_user(user):
+    """
+    Deactivate ``user``, soft-delete their posts, their comments and the
+    comments on their posts, and queue their PurgeJob.
+    """
+    now = timezone.now()
+    posts = Post.objects.filter(author=user)
+    comments = Comment.objects.filter(Q(author=user) | Q(post__author=user))
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        invalidate_user(user.pk)
+        affected = set(posts.values_list('pk', flat=True))
+        affected.update(
+            Comment.objects.filter(author=user).values_list('post_id', flat=True)
+        )
+        comments.update(deleted_at=now)
+        release_posts(posts)
+        posts.update(deleted_at=now)
+        invalidate_post(*affected)
+        return _schedule(PurgeJob.USER, user.pk)
+
+
+def run_purge_job(job_id):
+    """Run a pending (or resume a failed) PurgeJob."""
+    claimed = PurgeJob.objects.filter(
+        pk=job_id, status__in=[PurgeJob.PENDING, PurgeJob.FAILED]
+    ).update(status=PurgeJob.RUNNING, error='', updated_at=timezone.now())
+    if not claimed:
+        return
+    job = PurgeJob.objects.get(pk=job_id)
+    try:
+        if job.kind == PurgeJob.USER:
+            _purge_user(job)
+        else:
+            _purge_posts(job, Post.all_objects.filter(pk=job.target_id))
+    except Exception as exc:
+        logger.exception('Purge job %s failed', job_id)
+        PurgeJob.objects.filter(pk=job_id).update(
+            status=PurgeJob.FAILED, error=repr(exc), updated_at=timezone.now()
+        )
+        return
+    now = timezone.now()
+    PurgeJob.objects.filter(pk=job_id).update(
+        status=PurgeJob.DONE, finished_at=now, updated_at=now
+    )
+
+
+def _record(job, **removed):
+    """Add the row counts removed by the current chunk to the job's progress."""
+    for name, count in removed.items():
+        job.progress[name] = job.progress.get(name, 0) + count
+    PurgeJob.objects.filter(pk=job.pk).update(
+        progress=job.progress, updated_at=timezone.now()
+    )
+
+
+def _chunks(queryset):
+    """
+    Yield the pks of ``queryset`` a chunk at a time. The caller removes each
+    chunk before asking for the next, so the query always starts over.
+    """
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[: _chunk_size()])
+        if not ids:
+            return
+        yield ids
+
+
+def _delete(model, ids):
+    """
+    Remove ``model`` rows by pk in a single DELETE, without Django's
+    collector or delete signals; whatever depends on them is removed first.
+    """
+    rows = model._base_manager.filter(pk__in=ids)
+    return rows._raw_delete(router.db_for_write(model))
+
+
+def _delete_chunked(job, name, queryset):
+    for ids in _chunks(queryset):
+        with transaction.atomic():
+            _record(job, **{name: _delete(queryset.model, ids)})
+
+
+def _purge_comments(job, comments):
+    comment_type = ContentType.objects.get_for_model(Comment)
+    for ids in _chunks(comments):
+        votes = Vote.objects.filter(content_type=comment_type, object_id__in=ids)
+        _delete_chunked(job, 'vote', votes)
+        with transaction.atomic():
+            _record(job, comment=_delete(Comment, ids))
+
+
+def _purge_posts(job, posts):
+    post_type = ContentType.objects.get_for_model(Post)
+    for ids in _chunks(posts):
+        _purge_comments(job, Comment.all_objects.filter(post_id__in=ids))
+        votes = Vote.objects.filter(content_type=post_type, object_id__in=ids)
+        _delete_chunked(job, 'vote', votes)
+        _delete_chunked(
+            job, 'timeline_entry', TimelineEntry.objects.filter(post_id__in=ids)
+        )
+        with transaction.atomic():
+            unlink_posts(ids)
+            _record(job, post=_delete(Post, ids))
+
+
+def _purge_user(job):
+    user_id = job.target_id
+    _purge_posts(job, Post.all_objects.filter(author_id=user_id))
+    _purge_comments(job, Comment.all_objects.filter(author_id=user_id))
+
+    # The user's votes on other people's content come off its counters
+    for ids in _chunks(Vote.objects.filter(user_id=user_id)):
+        with transaction.atomic():
+            touched = Vote.objects.discard(Vote.objects.filter(pk__in=ids))
+            post_ids = set(touched.get(Post, ()))
+            post_ids.update(
+                Comment.all_objects.filter(
+                    pk__in=touched.get(Comment, ())
+                ).values_list('post_id', flat=True)
+            )
+            invalidate_post(*post_ids)
+            _record(job, vote=len(ids))
+
+    # Follows in either direction, keeping the other side's counts right
+    for field, other, counter in (
+        ('follower_id', 'following_id', 'followers_count'),
+        ('following_id', 'follower_id', 'following_count'),
+    ):
+        for ids in _chunks(Follow.objects.filter(**{field: user_id})):
+            with transaction.atomic():
+                others = Follow.objects.filter(pk__in=ids).values(other)
+                UserProfile.objects.filter(user_id__in=others).update(
+                    **{counter: F(counter) - 1}
+                )
+                _record(job, follow=_delete(Follow, ids))
+    timeline = TimelineEntry.objects.filter(user_id=user_id)
+    _delete_chunked(job, 'timeline_entry', timeline)
+
+    # Only a handful of rows are left for the regular cascade
+    with transaction.atomic():
+        profile = UserProfile.objects.filter(user_id=user_id).first()
+        deleted, _ = User.objects.filter(pk=user_id).delete()
+        if profile is not None:
+            pictures = [
+                profile.profile_picture.name,
+                *profile.profile_picture_variants.values(),
+            ]
+            transaction.on_commit(lambda: delete_files(pictures))
+        _record(job, user=deleted)
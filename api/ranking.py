@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+from math import log10
+
+# Reddit-style "hot": every 10x more net votes is worth as much as being
+# HOT_DECAY_SECONDS newer, so older posts sink unless they keep scoring.
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HOT_DECAY_SECONDS = 45000
+
+
+def hot(score, created_at):
+    order = log10(max(abs(score), 1))
+    sign = 1 if score > 0 else -1 if score < 0 else 0
+    seconds = (created_at - HOT_EPOCH).total_seconds()
+    return round(sign * order + seconds / HOT_DECAY_SECONDS, 7)
+
+
+def controversy(upvotes, downvotes):
+    """High when a post draws many votes that are evenly split."""
+    if upvotes <= 0 or downvotes <= 0:
+        return 0.0
+    magnitude = upvotes + downvotes
+    balance = min(upvotes, downvotes) / max(upvotes, downvotes)
+    return float(magnitude**balance)
+
+
+def ranking_for(upvote_count, downvote_count, score, created_at):
+    """Return the stored ranking columns of a post with these counters."""
+    return {
+        'hot_score': hot(score, created_at),
+        'controversy': controversy(upvote_count, downvote_count),
+    }
+
+
+def refresh_rankings(queryset, batch_size=1000):
+    """
+    Recompute and store the rankings of every post in ``queryset``, walking
+    it in primary-key batches. Returns the number of posts updated.
+    """
+    model = queryset.model
+    last_pk, total = 0, 0
+    while True:
+        batch = queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size]
+        rows = list(
+            batch.values_list(
+                'pk', 'upvote_count', 'downvote_count', 'score', 'created_at'
+            )
+        )
+        if not rows:
+            return total
+        model.objects.bulk_update(
+            [
+                model(pk=pk, **ranking_for(up, down, score, created_at))
+                for pk, up, down, score, created_at in rows
+            ],
+            ['hot_score', 'controversy'],
+        )
+        total += len(rows)
+        last_pk = rows[-1][0]
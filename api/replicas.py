@@ -0,0 +1,144 @@
+"""
+Read-replica routing. Reads made while serving a GET, HEAD or OPTIONS
+request go to one of the DATABASE_REPLICAS. Everything else uses the
+primary: writes, reads inside a transaction or after a write in the same
+request, and work outside requests (commands, background jobs).
+
+Replicas lag behind the primary, so a user whose request wrote something is
+pinned to the primary for REPLICA_PIN_SECONDS and reads their own writes
+(their vote, their edited post) in the requests that follow.
+"""
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import LazyObject
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current = ContextVar('replica_routing', default=None)
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def _cache():
+    return caches[getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', 'default')]
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Send ``user_id``'s reads to the primary for REPLICA_PIN_SECONDS."""
+    timeout = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+    _cache().set(_pin_key(user_id), True, timeout)
+
+
+def is_pinned(user_id):
+    return _cache().get(_pin_key(user_id)) is not None
+
+
+def _user_id(request):
+    """
+    The id of the user the view authenticated, if it did so yet. The lazy
+    session user put there by AuthenticationMiddleware is left alone:
+    resolving it would query the database from inside the router.
+    """
+    user = request.__dict__.get('user')
+    if user is None or issubclass(type(user), LazyObject):
+        return None
+    return user.pk if user.is_authenticated else None
+
+
+class RequestRouting:
+    """Where the reads of the request being served go."""
+
+    def __init__(self, request):
+        self.request = request
+        replicas = _replicas()
+        # A single replica per request, so its reads see one snapshot
+        if request.method in SAFE_METHODS and replicas:
+            self.replica = random.choice(replicas)
+        else:
+            self.replica = None
+        self.user_checked = False
+        self.wrote = False
+
+    def db_for_read(self):
+        if self.replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if not self.user_checked:
+            user_id = _user_id(self.request)
+            if user_id is not None:
+                self.user_checked = True
+                if is_pinned(user_id):
+                    self.replica = None
+                    return DEFAULT_DB_ALIAS
+        return self.replica
+
+    def db_for_write(self):
+        self.wrote = True
+        self.replica = None
+        return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _current.get()
+        return routing.db_for_read() if routing is not None else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = _current.get()
+        return routing.db_for_write() if routing is not None else DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *_replicas()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+
+def _finish(request, routing):
+    if routing.wrote and _replicas():
+        user_id = _user_id(request)
+        if user_id is not None:
+            pin_to_primary(user_id)
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """Track each request for ReplicaRouter and pin users that wrote."""
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            routing = RequestRouting(request)
+            token = _current.set(routing)
+            try:
+                response = await get_response(request)
+            finally:
+                _current.reset(token)
+            _finish(request, routing)
+            return response
+
+    else:
+
+        def middleware(request):
+            routing = RequestRouting(request)
+            token = _current.set(routing)
+            try:
+                response = get_response(request)
+            finally:
+                _current.reset(token)
+            _finish(request, routing)
+            return response
+
+    return middleware
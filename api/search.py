@@ -0,0 +1,78 @@
+import re
+
+from django.db import connection
+
+from .models import Post
+
+# Indexed expression from migration 0008; title matches weigh the most
+POSTGRES_DOCUMENT = """(
+    setweight(to_tsvector('english', title), 'A') ||
+    setweight(to_tsvector('english', keywords), 'B') ||
+    setweight(to_tsvector('english', category), 'B') ||
+    setweight(to_tsvector('english', content), 'C')
+)"""
+
+# bm25() column weights for title, content, category, keywords
+SQLITE_WEIGHTS = (10.0, 1.0, 4.0, 4.0)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _sqlite_match(query):
+    """
+    Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix so results show up while the user is still typing. Quoting
+    each token keeps FTS5 operators in user input from being interpreted.
+    """
+    tokens = TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_post_ids(query, limit, offset=0):
+    """
+    Return up to ``limit`` ``(post_id, rank)`` pairs matching ``query``,
+    most relevant first, using the database's full-text index. Soft-deleted
+    posts stay indexed until they are purged and are filtered out here.
+    """
+    if connection.vendor == 'sqlite':
+        match = _sqlite_match(query)
+        if match is None:
+            return []
+        sql = f"""
+            SELECT api_post_fts.rowid,
+                bm25(api_post_fts, {', '.join(map(str, SQLITE_WEIGHTS))})
+            FROM api_post_fts
+            JOIN api_post ON api_post.id = api_post_fts.rowid
+            WHERE api_post_fts MATCH %s AND api_post.deleted_at IS NULL
+            ORDER BY 2, api_post_fts.rowid DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [match, limit, offset]
+        # bm25() is lower-is-better; flip it so higher rank means better
+        sign = -1
+    elif connection.vendor == 'postgresql':
+        sql = f"""
+            SELECT id, ts_rank({POSTGRES_DOCUMENT}, query)
+            FROM api_post, websearch_to_tsquery('english', %s) query
+            WHERE {POSTGRES_DOCUMENT} @@ query AND deleted_at IS NULL
+            ORDER BY 2 DESC, id DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [query, limit, offset]
+        sign = 1
+    else:
+        # No full-text index on this backend: unranked substring scan
+        ids = (
+            Post.objects.filter(title__icontains=query)
+            .order_by('-id')
+            .values_list('id', flat=True)[offset : offset + limit]
+        )
+        return [(post_id, 0.0) for post_id in ids]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(post_id, sign * rank) for post_id, rank in cursor.fetchall()]
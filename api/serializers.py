@@ -1,9 +1,13 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import UserProfile, Post, Comment, Vote, Follow
+from .models import UserProfile, Post, Comment, Vote, Follow, PurgeJob
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.middleware.csrf import get_token
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
 from django.db import models
+from django.db.models import Q
 
 
 class CustomTokenSerializer(TokenObtainPairSerializer):
@@ -51,22 +55,94 @@ class UserSerializer(serializers.ModelSerializer):
 
 ### Custom code
 class VoteSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Vote
         fields = ['user_id', 'value']
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class FollowSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Follow
+        fields = ['follower', 'following']
+
+
+class PurgeJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PurgeJob
+        fields = [
+            'id',
+            'kind',
+            'target_id',
+            'status',
+            'progress',
+            'error',
+            'created_at',
+            'updated_at',
+            'finished_at',
+        ]
+
+
+class VoteOperationSerializer(serializers.Serializer):
+    TARGETS = {'post': Post, 'comment': Comment}
+
+    target = serializers.ChoiceField(choices=list(TARGETS))
+    id = serializers.IntegerField(min_value=1)
+    vote_type = serializers.ChoiceField(choices=[1, -1], allow_null=True)
+
+
+class BatchVoteSerializer(serializers.Serializer):
+    votes = VoteOperationSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class ExpandableFieldsMixin:
+    """
+    Drop the nested `EXPANDABLE_FIELDS` unless they are named in the `expand`
+    serializer context (see parse_expand()). Fields are resolved lazily, so
+    nested serializers see the context of the serializer they are bound to.
+    """
+
+    EXPANDABLE_FIELDS = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.context.get('expand', ())
+        for field_name in self.EXPANDABLE_FIELDS:
+            if field_name not in expand:
+                fields.pop(field_name, None)
+        return fields
+
+
+class EditedFieldsMixin:
+    """
+    Updates save only the fields the request set (and ``updated_at``), so
+    they cannot write back vote counters, rankings or a deletion stamp that
+    changed since the instance was loaded.
+    """
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+
+class CommentSerializer(
+    EditedFieldsMixin, ExpandableFieldsMixin, serializers.ModelSerializer
+):
+    # Every voter is only listed on request; see attach_my_votes() for the
+    # requesting user's own vote
+    EXPANDABLE_FIELDS = ('votes',)
+
     author_username = serializers.CharField(source='author.username', read_only=True)
     author_id = serializers.IntegerField(source='author.id', read_only=True)
-    upvotes = serializers.IntegerField(read_only=True)
-    downvotes = serializers.IntegerField(read_only=True)
-    total_votes = serializers.IntegerField(read_only=True)
+    upvotes = serializers.IntegerField(source='upvote_count', read_only=True)
+    downvotes = serializers.IntegerField(source='downvote_count', read_only=True)
+    total_votes = serializers.IntegerField(source='score', read_only=True)
     votes = VoteSerializer(many=True, read_only=True)
     post_title = serializers.CharField(source='post.title', read_only=True)
-    post_id = serializers.IntegerField(source='post.id', read_only=True)
+    post_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Comment
@@ -94,10 +170,14 @@ class CommentSerializer(serializers.ModelSerializer):
         ]
 
 
-class PostSerializer(serializers.ModelSerializer):
-    upvotes = serializers.IntegerField(read_only=True)
-    downvotes = serializers.IntegerField(read_only=True)
-    total_votes = serializers.IntegerField(read_only=True)
+class PostSerializer(
+    EditedFieldsMixin, ExpandableFieldsMixin, serializers.ModelSerializer
+):
+    EXPANDABLE_FIELDS = ('votes',)
+
+    upvotes = serializers.IntegerField(source='upvote_count', read_only=True)
+    downvotes = serializers.IntegerField(source='downvote_count', read_only=True)
+    total_votes = serializers.IntegerField(source='score', read_only=True)
     author_id = serializers.IntegerField(source='author.id', read_only=True)
     author_username = serializers.CharField(source='author.username', read_only=True)
     comments_count = serializers.IntegerField(source='comments.count', read_only=True)
@@ -133,10 +213,134 @@ class PostSerializer(serializers.ModelSerializer):
         ]
 
 
+class PostSummarySerializer(PostSerializer):
+    """
+    List representation of a post. The nested `comments` and `votes` are only
+    included when requested through the `expand` serializer context, and
+    `comments_count` is read from an annotation instead of a COUNT per post.
+    """
+
+    EXPANDABLE_FIELDS = ('comments', 'votes')
+
+    comments_count = serializers.IntegerField(read_only=True)
+
+
+class CommentSummarySerializer(CommentSerializer):
+    """List representation of a comment, with `votes` only on request."""
+
+
+class ThreadCommentSerializer(CommentSummarySerializer):
+    """
+    A comment within its post's thread, which already identifies the post, so
+    `post_title` is left out and no post row has to be joined per comment.
+    """
+
+    class Meta(CommentSummarySerializer.Meta):
+        fields = [
+            name
+            for name in CommentSummarySerializer.Meta.fields
+            if name != 'post_title'
+        ]
+
+
+def _vote_targets(posts, comments):
+    posts, comments = list(posts), list(comments)
+    for post in posts:
+        comments.extend(post.get('comments', ()))
+    return posts, comments
+
+
+def _my_votes(user, posts, comments, content_types):
+    """``(content_type_id, object_id, value)`` rows of ``user``'s votes."""
+    targets = Q()
+    for model, items in ((Post, posts), (Comment, comments)):
+        if items:
+            targets |= Q(
+                content_type=content_types[model],
+                object_id__in={item['id'] for item in items},
+            )
+    return Vote.objects.filter(targets, user=user).values_list(
+        'content_type_id', 'object_id', 'value'
+    )
+
+
+def _set_my_votes(posts, comments, rows, content_types):
+    models_by_type = {content_types[model].pk: model for model in content_types}
+    mine = {
+        (models_by_type[content_type_id], object_id): value
+        for content_type_id, object_id, value in rows
+    }
+    for model, items in ((Post, posts), (Comment, comments)):
+        for item in items:
+            item['my_vote'] = mine.get((model, item['id']))
+
+
+def attach_my_votes(user, posts=(), comments=()):
+    """
+    Set `my_vote` (1, -1 or None) on serialized ``posts`` (including any
+    embedded `comments`) and ``comments`` for ``user``, with one indexed
+    lookup on (user, content_type, object_id). Works on cached payloads,
+    which are shared between users and never carry it themselves.
+    """
+    posts, comments = _vote_targets(posts, comments)
+    if not posts and not comments:
+        return
+    content_types, rows = {}, []
+    if user is not None and user.is_authenticated:
+        content_types = ContentType.objects.get_for_models(Post, Comment)
+        rows = _my_votes(user, posts, comments, content_types)
+    _set_my_votes(posts, comments, rows, content_types)
+
+
+async def aattach_my_votes(user, posts=(), comments=()):
+    """attach_my_votes() for async views, using the async ORM."""
+    posts, comments = _vote_targets(posts, comments)
+    if not posts and not comments:
+        return
+    content_types, rows = {}, []
+    if user is not None and user.is_authenticated:
+        # Cached per process after the first call
+        content_types = await sync_to_async(ContentType.objects.get_for_models)(
+            Post, Comment
+        )
+        rows = [
+            row async for row in _my_votes(user, posts, comments, content_types)
+        ]
+    _set_my_votes(posts, comments, rows, content_types)
+
+
+def parse_expand(request):
+    """Return the set of expandable fields named in `?expand=a,b`."""
+    value = request.GET.get('expand', '')
+    return {
+        name.strip()
+        for name in value.split(',')
+        if name.strip() in PostSummarySerializer.EXPANDABLE_FIELDS
+    }
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
+    profile_picture_urls = serializers.SerializerMethodField()
 
     class Meta:
         model = UserProfile
-        fields = ['username', 'email', 'bio', 'profile_picture']
+        fields = [
+            'username',
+            'email',
+            'bio',
+            'profile_picture',
+            'profile_picture_status',
+            'profile_picture_urls',
+        ]
+        read_only_fields = ['profile_picture_status']
+
+    def get_profile_picture_urls(self, profile):
+        """URLs of the resized variants by size name; empty until processed."""
+        request = self.context.get('request')
+        urls = {}
+        for name, path in profile.profile_picture_variants.items():
+            url = default_storage.url(path)
+            urls[name] = request.build_absolute_uri(url) if request else url
+        return urls
@@ -0,0 +1,45 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .auth import invalidate_user
+from .cache import invalidate_post
+from .models import Post, Comment
+from .tags import previous_tagging, release_tagging, sync_tagging
+from .timeline import fan_out_post
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_cached_post(sender, instance, **kwargs):
+    invalidate_post(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_cached_comment_post(sender, instance, **kwargs):
+    invalidate_post(instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        fan_out_post(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_tagging(sender, instance, update_fields=None, **kwargs):
+    instance._previous_tagging = previous_tagging(instance, update_fields)
+
+
+@receiver(post_save, sender=Post)
+def sync_post_tagging(sender, instance, **kwargs):
+    sync_tagging(instance, instance.__dict__.pop('_previous_tagging', None))
+
+
+@receiver(pre_delete, sender=Post)
+def release_post_tagging(sender, instance, **kwargs):
+    release_tagging(instance)
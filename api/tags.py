@@ -0,0 +1,160 @@
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef
+
+from .models import CategoryCount, Post, Tag
+
+MAX_FILTER_TAGS = 10
+
+
+def parse_keywords(keywords):
+    """
+    Split a comma-separated `Post.keywords` string into unique tag names,
+    lowercased with whitespace collapsed, in their original order.
+    """
+    max_length = Tag._meta.get_field('name').max_length
+    names = []
+    for name in (keywords or '').split(','):
+        name = ' '.join(name.split()).lower()[:max_length]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def _adjust(model, names, delta):
+    """Shift ``post_count`` of the named rows, creating missing ones first."""
+    if not names:
+        return
+    if delta > 0:
+        model.objects.bulk_create(
+            [model(name=name) for name in names], ignore_conflicts=True
+        )
+    model.objects.filter(name__in=names).update(post_count=F('post_count') + delta)
+
+
+def previous_tagging(post, update_fields=None):
+    """
+    Return the ``(category, keywords)`` stored for ``post`` before it is
+    saved, or None when the save cannot change them.
+    """
+    if post._state.adding:
+        return '', ''
+    if update_fields is not None and not {'category', 'keywords'} & set(
+        update_fields
+    ):
+        return None
+    stored = Post.objects.filter(pk=post.pk).values_list('category', 'keywords')
+    return stored.first() or ('', '')
+
+
+def sync_tagging(post, previous):
+    """
+    Bring ``post.tags`` and the tag and category counts in line with the
+    saved ``post``, given its :func:`previous_tagging`. Writes that bypass
+    ``save()`` (``QuerySet.update()``, ``bulk_create()``) are not tracked.
+    """
+    if previous is None:
+        return
+    old_category, old_keywords = previous
+    old_tags, new_tags = parse_keywords(old_keywords), parse_keywords(post.keywords)
+    removed = [name for name in old_tags if name not in new_tags]
+    added = [name for name in new_tags if name not in old_tags]
+    if old_category == post.category and not removed and not added:
+        return
+
+    with transaction.atomic():
+        if old_category != post.category:
+            _adjust(CategoryCount, [old_category] if old_category else [], -1)
+            _adjust(CategoryCount, [post.category] if post.category else [], 1)
+        if removed:
+            Post.tags.through.objects.filter(
+                post=post, tag__name__in=removed
+            ).delete()
+            _adjust(Tag, removed, -1)
+        if added:
+            _adjust(Tag, added, 1)
+            post.tags.add(
+                *Tag.objects.filter(name__in=added).values_list('pk', flat=True)
+            )
+
+
+def release_tagging(post):
+    """Drop ``post`` from the counts; call before it is deleted."""
+    if post.deleted_at is not None:
+        # Already released by release_posts() when it was soft-deleted
+        return
+    with transaction.atomic():
+        Tag.objects.filter(posts=post).update(post_count=F('post_count') - 1)
+        if post.category:
+            CategoryCount.objects.filter(name=post.category).update(
+                post_count=F('post_count') - 1
+            )
+
+
+def _release_grouped(model, field, counts):
+    """Subtract ``{name: count}`` from ``post_count``, one UPDATE per count."""
+    by_count = {}
+    for name, count in counts:
+        by_count.setdefault(count, []).append(name)
+    for count, names in by_count.items():
+        model.objects.filter(**{f'{field}__in': names}).update(
+            post_count=F('post_count') - count
+        )
+
+
+def release_posts(posts):
+    """
+    release_tagging() for the live ``posts`` (a queryset) about to be
+    soft-deleted (see api.purge), in a few set-based UPDATEs; run it in the
+    transaction that stamps them. Their links to the tags stay until
+    unlink_posts() when they are purged.
+    """
+    links = Post.tags.through.objects.filter(post__in=posts)
+    categories = (
+        posts.exclude(category='')
+        .values_list('category')
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+    _release_grouped(
+        Tag, 'pk', links.values_list('tag_id').annotate(total=Count('pk')).order_by()
+    )
+    _release_grouped(CategoryCount, 'name', categories)
+
+
+def unlink_posts(post_ids):
+    """Remove the tag links of posts about to be purged without signals."""
+    Post.tags.through.objects.filter(post_id__in=post_ids).delete()
+
+
+def filter_posts(posts, category=None, tags=(), match_all=False):
+    """
+    Restrict ``posts`` to a category and to posts carrying any (or, with
+    ``match_all``, every) tag in ``tags``. Each tag is an indexed EXISTS
+    lookup on the post/tag table, so no rows are duplicated, and nothing is
+    queried until ``posts`` is evaluated.
+    """
+    if category:
+        posts = posts.filter(category=category)
+    names = {name for tag in tags for name in parse_keywords(tag)}
+    if not names:
+        return posts
+
+    tagged = Post.tags.through.objects.filter(post=OuterRef('pk'))
+    if match_all:
+        for name in names:
+            posts = posts.filter(Exists(tagged.filter(tag__name=name)))
+        return posts
+    return posts.filter(Exists(tagged.filter(tag__name__in=names)))
+
+
+def tag_cloud(limit):
+    """The ``limit`` most used tags and categories, read off their indexes."""
+
+    def top(model):
+        return list(
+            model.objects.filter(post_count__gt=0)
+            .order_by('-post_count', 'name')
+            .values('name', 'post_count')[:limit]
+        )
+
+    return {'categories': top(CategoryCount), 'tags': top(Tag)}
@@ -0,0 +1,37 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _run(function, *args):
+    try:
+        return function(*args)
+    finally:
+        # Worker threads hold their own database connections
+        close_old_connections()
+
+
+def submit(function, *args):
+    """
+    Run ``function(*args)`` on the background worker pool, or inline when
+    BACKGROUND_WORKERS is 0. Returns a Future. Work still queued when the
+    process exits is lost, so callers record what they submit in the
+    database and can resume it from a management command.
+    """
+    global _executor
+    workers = getattr(settings, 'BACKGROUND_WORKERS', 2)
+    if not workers:
+        future = Future()
+        future.set_result(function(*args))
+        return future
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='background'
+            )
+    return _executor.submit(_run, function, *args)
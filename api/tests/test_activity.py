@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from ..models import Post, Comment
+
+User = get_user_model()
+
+
+class UserActivityTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='testpass')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('user-activity', args=['writer'])
+        self.posts = [
+            Post.objects.create(author=self.user, title=f'Post {i}', content='Body')
+            for i in range(3)
+        ]
+        self.comments = [
+            Comment.objects.create(post=self.posts[0], author=self.user, content='Hi')
+            for _ in range(4)
+        ]
+
+    def test_sections_paginate_independently(self):
+        response = self.client.get(self.url + '?page_size=2')
+        self.assertEqual(len(response.data['posts']['results']), 2)
+        self.assertEqual(len(response.data['comments']['results']), 2)
+        self.assertNotIn('votes', response.data['comments']['results'][0])
+
+        response = self.client.get(response.data['comments']['next'])
+        comment_ids = [c['id'] for c in response.data['comments']['results']]
+        self.assertEqual(comment_ids, [self.comments[1].id, self.comments[0].id])
+        # The posts section stays on its first page
+        self.assertEqual(response.data['posts']['results'][0]['id'], self.posts[2].id)
+
+    def test_stream_walks_everything_in_time_order(self):
+        # Ties between a post and a comment must not skip or repeat items
+        now = timezone.now()
+        Post.objects.filter(pk=self.posts[1].pk).update(created_at=now)
+        Comment.objects.filter(pk=self.comments[2].pk).update(created_at=now)
+
+        seen, url = [], self.url + '?mode=stream&page_size=2'
+        while url:
+            response = self.client.get(url)
+            seen.extend(
+                (item['type'], item['item']['id'])
+                for item in response.data['results']
+            )
+            url = response.data['next']
+
+        items = [('post', p) for p in Post.objects.all()] + [
+            ('comment', c) for c in Comment.objects.all()
+        ]
+        items.sort(
+            key=lambda item: (item[1].created_at, item[0] == 'post', item[1].id),
+            reverse=True,
+        )
+        self.assertEqual(seen, [(kind, obj.id) for kind, obj in items])
+
+    def test_unknown_user(self):
+        response = self.client.get(reverse('user-activity', args=['nobody']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_user_without_activity(self):
+        User.objects.create_user(username='lurker', password='testpass')
+        response = self.client.get(reverse('user-activity', args=['lurker']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['posts']['results'], [])
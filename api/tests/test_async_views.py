@@ -0,0 +1,121 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from ..models import Post, Comment, Vote
+
+User = get_user_model()
+
+
+class AsyncReadViewTest(APITestCase):
+    """The async views must answer exactly like their sync counterparts."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.post = Post.objects.create(
+            author=self.user, title='Post', content='Body', keywords='python'
+        )
+        Post.objects.create(author=self.user, title='Other', content='Body')
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, content='Comment'
+        )
+        Vote.objects.toggle(self.user, Post, self.post.pk, 1)
+        Vote.objects.toggle(self.user, Comment, self.comment.pk, -1)
+
+    async def get_both(self, sync_url, async_url):
+        sync = await sync_to_async(self.client.get)(sync_url, headers=self.auth)
+        response = await self.async_client.get(async_url, headers=self.auth)
+        self.assertEqual(response.status_code, sync.status_code)
+        return sync, response
+
+    async def assertSameAsSync(self, sync_url, async_url):
+        sync, response = await self.get_both(sync_url, async_url)
+        # Pagination links point back at the endpoint that was called
+        content = response.content.decode().replace('/api/async/', '/api/')
+        self.assertEqual(json.loads(content), sync.json())
+        return response
+
+    async def test_feed(self):
+        for query in ('', '?page_size=1', '?sort=top&tag=python', '?sort=nope'):
+            with self.subTest(query=query):
+                await self.assertSameAsSync(
+                    reverse('get-posts') + query, reverse('async-get-posts') + query
+                )
+
+    async def test_feed_next_page(self):
+        response = await self.async_client.get(
+            reverse('async-get-posts') + '?page_size=1', headers=self.auth
+        )
+        next_page = await self.async_client.get(
+            response.json()['next'], headers=self.auth
+        )
+        self.assertEqual(next_page.json()['results'][0]['title'], 'Post')
+
+    async def test_post_detail(self):
+        response = await self.assertSameAsSync(
+            reverse('post-refresh', args=[self.post.pk]),
+            reverse('async-post-refresh', args=[self.post.pk]),
+        )
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.json()['my_vote'], 1)
+        self.assertEqual(response.json()['comments'][0]['my_vote'], -1)
+
+        response = await self.async_client.get(
+            reverse('async-get-comments', args=[self.post.pk]),
+            headers={**self.auth, 'If-None-Match': response['ETag']},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_post_detail_miss(self):
+        response = await self.async_client.get(
+            reverse('async-post-refresh', args=[self.post.pk]) + '?expand=votes',
+            headers=self.auth,
+        )
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()['votes']), 1)
+
+    async def test_missing_post(self):
+        await self.get_both(
+            reverse('post-refresh', args=[self.post.pk + 100]),
+            reverse('async-post-refresh', args=[self.post.pk + 100]),
+        )
+
+    async def test_user_activity(self):
+        for query in ('', '?mode=stream&expand=votes', '?posts_cursor=bad'):
+            with self.subTest(query=query):
+                await self.assertSameAsSync(
+                    reverse('user-activity', args=['reader']) + query,
+                    reverse('async-user-activity', args=['reader']) + query,
+                )
+        await self.assertSameAsSync(
+            reverse('user-activity', args=['nobody']),
+            reverse('async-user-activity', args=['nobody']),
+        )
+
+    async def test_authentication(self):
+        url = reverse('async-get-posts')
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+        response = await self.async_client.get(
+            url, headers={'Authorization': 'Bearer junk'}
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
+
+        # Post detail is readable anonymously, like RefreshPost
+        response = await self.async_client.get(
+            reverse('async-post-refresh', args=[self.post.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['my_vote'])
+
+    async def test_read_only(self):
+        response = await self.async_client.post(
+            reverse('async-get-posts'), headers=self.auth
+        )
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,115 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from ..auth import CACHED_FIELDS, _cache, _user_key
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(BACKGROUND_WORKERS=0)
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='testpass')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+        self.post = Post.objects.create(
+            author=self.user, title='Post', content='Body'
+        )
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, content='Comment'
+        )
+
+    def user_queries(self, method, url, data=None):
+        """Return the response and the queries on auth_user it took."""
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format='json')
+        return response, [q for q in queries if 'FROM "auth_user"' in q['sql']]
+
+    def test_user_is_loaded_once(self):
+        url = reverse('tag-cloud')
+        response, loads = self.user_queries('get', url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(loads), 1)
+
+        response, loads = self.user_queries('get', url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(loads, [])
+
+    def test_password_hash_is_not_cached(self):
+        self.client.get(reverse('tag-cloud'))
+        entry = _cache().get(_user_key(self.user.pk))
+        self.assertEqual(set(entry), set(CACHED_FIELDS))
+        self.assertNotIn(self.user.password, entry.values())
+
+    # override_settings() would rebind simplejwt's api_settings, not change
+    # the instance already imported here and in api.auth
+    @mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True)
+    def test_revoked_token_is_rejected_from_the_cache(self):
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = reverse('tag-cloud')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        entry = _cache().get(_user_key(self.user.pk))
+        self.assertNotIn(self.user.password, entry.values())
+
+        # Tokens issued before a password change carry another digest
+        token[api_settings.REVOKE_TOKEN_CLAIM] = 'stale'
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response, loads = self.user_queries('get', url)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(loads, [])
+
+    def test_edit_and_delete_invalidate(self):
+        url = reverse('tag-cloud')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse('edit-user', args=[self.user.pk]),
+                {'email': 'new@example.com'},
+                format='json',
+            )
+        _, loads = self.user_queries('get', url)
+        self.assertEqual(len(loads), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('delete-user', args=[self.user.pk]))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_ownership_checks_do_not_load_the_author(self):
+        # Without comments, whose authors the edited post would render
+        post = Post.objects.create(author=self.user, title='Bare', content='Body')
+        for method, url, data in (
+            ('patch', reverse('post-update', args=[post.pk]), {'title': 'New'}),
+            (
+                'patch',
+                reverse('edit-comment', args=[self.post.pk, self.comment.pk]),
+                {'content': 'New'},
+            ),
+            ('delete', reverse('delete-post', args=[self.post.pk]), None),
+        ):
+            self.client.get(reverse('tag-cloud'))
+            with self.subTest(url=url):
+                response, loads = self.user_queries(method, url, data)
+                self.assertLess(response.status_code, 300)
+                self.assertEqual(loads, [])
+
+    def test_others_cannot_delete_a_post(self):
+        other = User.objects.create_user(username='other', password='testpass')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(other)}'
+        )
+        response = self.client.delete(reverse('delete-post', args=[self.post.pk]))
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
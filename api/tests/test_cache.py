@@ -0,0 +1,210 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils.http import parse_http_date
+from rest_framework.test import APITestCase
+from ..models import Post, Comment
+
+User = get_user_model()
+
+
+class PostCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='testpass')
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title='Post', content='Body')
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, content='Comment'
+        )
+        self.url = reverse('post-refresh', args=[self.post.id])
+
+    def get(self, url=None):
+        return self.client.get(url or self.url)
+
+    def assertInvalidates(self, write):
+        self.get()
+        self.assertEqual(self.get()['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        return response
+
+    def test_hit_skips_database(self):
+        self.get()
+        # Only the requesting user's own votes are looked up
+        with self.assertNumQueries(1):
+            response = self.get()
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['title'], 'Post')
+
+        self.client.force_authenticate(None)
+        with self.assertNumQueries(0):
+            response = self.get()
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertIsNone(response.data['my_vote'])
+
+    def test_refresh_and_comments_share_the_entry(self):
+        self.get()
+        response = self.get(reverse('get-comments', args=[self.post.id]))
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_missing_post_is_not_cached(self):
+        url = reverse('post-refresh', args=[self.post.id + 1])
+        self.assertEqual(self.get(url).status_code, 404)
+        self.assertEqual(self.get(url).status_code, 404)
+
+    @override_settings(POST_CACHE_TIMEOUT=300, POST_CACHE_VERSION_TIMEOUT=60)
+    def test_versions_expire(self):
+        # Version keys are made for any id requested and must not pile up
+        url = reverse('post-refresh', args=[self.post.id + 1])
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            self.get(url)
+        timeouts = [
+            call.args[2] for call in add.call_args_list if 'version' in call.args[0]
+        ]
+        self.assertEqual(timeouts, [300])
+
+    def test_post_edit(self):
+        response = self.assertInvalidates(
+            lambda: self.client.patch(
+                reverse('post-update', args=[self.post.id]), {'title': 'Edited'}
+            )
+        )
+        self.assertEqual(response.data['title'], 'Edited')
+
+    def test_post_vote(self):
+        response = self.assertInvalidates(
+            lambda: self.client.post(
+                reverse('vote-on-post', args=[self.post.id]),
+                {'vote_type': 1},
+                format='json',
+            )
+        )
+        self.assertEqual(response.data['total_votes'], 1)
+
+    def test_comment_vote(self):
+        response = self.assertInvalidates(
+            lambda: self.client.post(
+                reverse('vote-on-comment', args=[self.post.id, self.comment.id]),
+                {'vote_type': -1},
+                format='json',
+            )
+        )
+        self.assertEqual(response.data['comments'][0]['total_votes'], -1)
+
+    def test_batch_vote(self):
+        response = self.assertInvalidates(
+            lambda: self.client.post(
+                reverse('vote-batch'),
+                {'votes': [{'target': 'comment', 'id': self.comment.id, 'vote_type': 1}]},
+                format='json',
+            )
+        )
+        self.assertEqual(response.data['comments'][0]['total_votes'], 1)
+
+    def test_comment_create_edit_delete(self):
+        response = self.assertInvalidates(
+            lambda: self.client.post(
+                reverse('create-comment', args=[self.post.id]), {'content': 'New'}
+            )
+        )
+        self.assertEqual(response.data['comments_count'], 2)
+
+        response = self.assertInvalidates(
+            lambda: self.client.patch(
+                reverse('edit-comment', args=[self.post.id, self.comment.id]),
+                {'content': 'Edited'},
+            )
+        )
+        self.assertEqual(response.data['comments'][0]['content'], 'Edited')
+
+        response = self.assertInvalidates(
+            lambda: self.client.delete(
+                reverse('delete-comment', args=[self.post.id, self.comment.id])
+            )
+        )
+        self.assertEqual(response.data['comments_count'], 1)
+
+    def test_post_delete(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('delete-post', args=[self.post.id]))
+        self.assertEqual(self.get().status_code, 404)
+
+    def test_stats(self):
+        self.get()
+        self.get()
+        self.get()
+        self.assertEqual(self.client.get(reverse('post-cache-stats')).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('post-cache-stats'))
+        self.assertEqual(response.data['hits'], 2)
+        self.assertEqual(response.data['misses'], 1)
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='testpass')
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title='Post', content='Body')
+        self.url = reverse('get-comments', args=[self.post.id])
+
+    def test_if_none_match(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.url)
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_within_the_same_second(self):
+        with mock.patch('api.cache.time.time', return_value=1_000_000.5):
+            last_modified = self.client.get(self.url)['Last-Modified']
+            for _ in range(2):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.client.post(
+                        reverse('vote-on-post', args=[self.post.id]),
+                        {'vote_type': 1},
+                        format='json',
+                    )
+                response = self.client.get(
+                    self.url, HTTP_IF_MODIFIED_SINCE=last_modified
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(
+                    parse_http_date(response['Last-Modified']),
+                    parse_http_date(last_modified),
+                )
+                last_modified = response['Last-Modified']
+
+    def test_validators_change_with_activity(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.user, content='New')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['comments_count'], 1)
+
+    def test_validators_vary_by_user(self):
+        etag = self.client.get(self.url)['ETag']
+        other = User.objects.create_user(username='other', password='testpass')
+        self.client.force_authenticate(other)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('private', response['Cache-Control'])
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from ..models import Post, Comment, Vote
+
+User = get_user_model()
+
+
+class CommentThreadTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title='Post', content='Body')
+        other = Post.objects.create(author=self.user, title='Other', content='Body')
+        Comment.objects.create(post=other, author=self.user, content='Elsewhere')
+        now = timezone.now()
+        self.comments = []
+        for i in range(5):
+            comment = Comment.objects.create(
+                post=self.post, author=self.user, content=f'Comment {i}'
+            )
+            Comment.objects.filter(pk=comment.pk).update(
+                created_at=now - timedelta(minutes=5 - i)
+            )
+            self.comments.append(comment)
+        Vote.objects.toggle(self.user, Comment, self.comments[3].pk, 1)
+        Vote.objects.toggle(self.user, Comment, self.comments[1].pk, -1)
+        self.url = reverse('comment-thread', args=[self.post.pk])
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(comment['id'] for comment in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_sorts(self):
+        ids = [comment.pk for comment in self.comments]
+        self.assertEqual(self.collect(f'{self.url}?page_size=2'), ids)
+        self.assertEqual(
+            self.collect(f'{self.url}?sort=newest&page_size=2'), ids[::-1]
+        )
+        self.assertEqual(
+            self.collect(f'{self.url}?sort=top&page_size=2'),
+            [ids[3], ids[4], ids[2], ids[0], ids[1]],
+        )
+
+    def test_invalid_sort(self):
+        response = self.client.get(f'{self.url}?sort=best')
+        self.assertEqual(response.status_code, 400)
+
+    def test_comment_representation(self):
+        response = self.client.get(f'{self.url}?page_size=1')
+        comment = response.data['results'][0]
+        self.assertEqual(comment['post_id'], self.post.pk)
+        self.assertNotIn('post_title', comment)
+        self.assertNotIn('votes', comment)
+
+        response = self.client.get(f'{self.url}?sort=top&page_size=1&expand=votes')
+        self.assertEqual(len(response.data['results'][0]['votes']), 1)
+
+    def test_missing_post(self):
+        response = self.client.get(reverse('comment-thread', args=[self.post.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_without_comments(self):
+        post = Post.objects.create(author=self.user, title='Quiet', content='Body')
+        response = self.client.get(reverse('comment-thread', args=[post.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
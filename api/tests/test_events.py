@@ -0,0 +1,176 @@
+import asyncio
+import json
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ..events import InProcessBroker, get_broker
+from ..models import Post, Comment
+
+User = get_user_model()
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, post_id, event_type, data):
+        self.events.append((post_id, event_type, data))
+
+
+class InProcessBrokerTest(APITestCase):
+    async def test_routes_events_to_subscribers_of_the_post(self):
+        broker = InProcessBroker()
+        first = broker.subscribe([1, 2])
+        second = broker.subscribe([2])
+        # publish() is called from request threads
+        thread = threading.Thread(target=broker.publish, args=(1, 'vote', {'n': 1}))
+        thread.start()
+        thread.join()
+        broker.publish(2, 'vote', {'n': 2})
+
+        event = await first.get(1)
+        self.assertEqual((event['post_id'], event['data']), (1, {'n': 1}))
+        self.assertEqual((await first.get(1))['data'], {'n': 2})
+        self.assertEqual((await second.get(1))['data'], {'n': 2})
+        self.assertIsNone(await second.get(0.01))
+
+        broker.unsubscribe(first)
+        broker.publish(1, 'vote', {'n': 3})
+        await asyncio.sleep(0)
+        self.assertIsNone(await first.get(0.01))
+
+    async def test_slow_subscriber_drops_oldest_events(self):
+        broker = InProcessBroker(queue_size=2)
+        subscription = broker.subscribe([1])
+        for n in range(3):
+            broker.publish(1, 'vote', {'n': n})
+        await asyncio.sleep(0)
+        self.assertEqual((await subscription.get(1))['data'], {'n': 1})
+        self.assertEqual((await subscription.get(1))['data'], {'n': 2})
+
+
+@override_settings(EVENT_BROKER='api.tests.test_events.RecordingBroker')
+class EventPublishingTest(APITestCase):
+    def setUp(self):
+        self.events = get_broker().events
+        self.events.clear()
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title='Post', content='Body')
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, content='Comment'
+        )
+
+    def test_post_vote(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('vote-on-post', args=[self.post.pk]),
+                {'vote_type': 1},
+                format='json',
+            )
+        self.assertEqual(
+            self.events,
+            [
+                (
+                    self.post.pk,
+                    'vote',
+                    {
+                        'target': 'post',
+                        'id': self.post.pk,
+                        'upvotes': 1,
+                        'downvotes': 0,
+                        'total_votes': 1,
+                    },
+                )
+            ],
+        )
+
+    def test_comment_vote(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('vote-on-comment', args=[self.post.pk, self.comment.pk]),
+                {'vote_type': -1},
+                format='json',
+            )
+        [(post_id, event_type, data)] = self.events
+        self.assertEqual((post_id, event_type), (self.post.pk, 'vote'))
+        self.assertEqual((data['target'], data['id']), ('comment', self.comment.pk))
+        self.assertEqual(data['total_votes'], -1)
+
+    def test_batch_vote(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('vote-batch'),
+                {
+                    'votes': [
+                        {'target': 'comment', 'id': self.comment.pk, 'vote_type': 1},
+                        {'target': 'post', 'id': self.post.pk, 'vote_type': -1},
+                    ]
+                },
+                format='json',
+            )
+        self.assertEqual(
+            sorted((post_id, data['target']) for post_id, _, data in self.events),
+            [(self.post.pk, 'comment'), (self.post.pk, 'post')],
+        )
+
+    def test_new_comment(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('create-comment', args=[self.post.pk]), {'content': 'New'}
+            )
+        [(post_id, event_type, data)] = self.events
+        self.assertEqual((post_id, event_type), (self.post.pk, 'comment'))
+        self.assertEqual(data['comment']['content'], 'New')
+
+    def test_nothing_is_published_on_rollback(self):
+        self.client.post(
+            reverse('vote-on-post', args=[self.post.pk]),
+            {'vote_type': 1},
+            format='json',
+        )
+        self.assertEqual(self.events, [])
+
+
+class EventStreamTest(APITestCase):
+    async def read(self, content):
+        return (await anext(content)).decode()
+
+    async def test_streams_subscribed_post_events(self):
+        response = await self.async_client.get(reverse('post-events'), {'posts': '7,8'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = aiter(response.streaming_content)
+        self.assertTrue((await self.read(content)).startswith('retry:'))
+
+        get_broker().publish(9, 'vote', {'id': 9})
+        get_broker().publish(8, 'comment', {'comment': {'id': 1}})
+        chunk = await self.read(content)
+        lines = chunk.strip().split('\n')
+        self.assertEqual(lines[1], 'event: comment')
+        self.assertEqual(
+            json.loads(lines[2][len('data: ') :]), {'post_id': 8, 'comment': {'id': 1}}
+        )
+        await response.streaming_content.aclose()
+
+    async def test_heartbeat(self):
+        with self.settings(EVENT_STREAM_HEARTBEAT=0.01):
+            response = await self.async_client.get(reverse('post-events'), {'posts': 1})
+            content = aiter(response.streaming_content)
+            await self.read(content)
+            self.assertEqual(await self.read(content), ': keepalive\n\n')
+            await response.streaming_content.aclose()
+
+    async def test_requires_post_ids(self):
+        for posts in ('', 'x', ','.join(map(str, range(51)))):
+            response = await self.async_client.get(
+                reverse('post-events'), {'posts': posts}
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_requires_asgi(self):
+        # A WSGI server would wait for the endless stream to end
+        response = self.client.get(reverse('post-events'), {'posts': 1})
+        self.assertEqual(response.status_code, 501)
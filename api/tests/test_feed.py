@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from ..models import Post, Comment, Vote
+
+User = get_user_model()
+
+
+class PostFeedPaginationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.client.force_authenticate(self.user)
+        self.posts = [
+            Post.objects.create(author=self.user, title=f'Post {i}', content='Body')
+            for i in range(7)
+        ]
+        # Give several posts the same timestamp so the id tie-breaker matters
+        Post.objects.filter(id__in=[p.id for p in self.posts[2:5]]).update(
+            created_at=timezone.now()
+        )
+        self.url = reverse('get-posts')
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_walks_every_post_once_in_order(self):
+        ids = self.collect(f'{self.url}?page_size=2')
+        expected = list(
+            Post.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(f'{self.url}?page_size=1000')
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertIsNone(response.data['next'])
+
+    def test_previous_link(self):
+        first = self.client.get(f'{self.url}?page_size=3')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNone(first.data['previous'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'{self.url}?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class PostSummaryTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title='Post', content='Body')
+        for _ in range(3):
+            Comment.objects.create(post=self.post, author=self.user, content='Hi')
+        Vote.objects.toggle(self.user, Post, self.post.id, 1)
+
+    def test_summary_omits_nested_data(self):
+        response = self.client.get(reverse('get-posts'))
+        post = response.data['results'][0]
+        self.assertNotIn('comments', post)
+        self.assertNotIn('votes', post)
+        self.assertEqual(post['comments_count'], 3)
+        self.assertEqual(post['total_votes'], 1)
+
+    def test_expand(self):
+        response = self.client.get(reverse('get-posts') + '?expand=comments,votes')
+        post = response.data['results'][0]
+        self.assertEqual(len(post['comments']), 3)
+        self.assertEqual(post['votes'], [{'user_id': self.user.id, 'value': 1}])
+
+    def test_create_post_list_uses_summary(self):
+        response = self.client.get(reverse('create-post') + '?expand=votes')
+        post = response.data[0]
+        self.assertNotIn('comments', post)
+        self.assertEqual(len(post['votes']), 1)
+        self.assertEqual(post['comments_count'], 3)
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ..models import Post, Comment, Vote
+
+User = get_user_model()
+
+
+class MyVoteTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.other = User.objects.create_user(username='other', password='testpass')
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.other, title='Post', content='Body')
+        self.liked = Comment.objects.create(
+            post=self.post, author=self.other, content='Liked'
+        )
+        self.plain = Comment.objects.create(
+            post=self.post, author=self.other, content='Plain'
+        )
+        Vote.objects.toggle(self.user, Post, self.post.pk, -1)
+        Vote.objects.toggle(self.user, Comment, self.liked.pk, 1)
+        Vote.objects.toggle(self.other, Comment, self.plain.pk, 1)
+
+    def test_post_detail(self):
+        for name in ('post-refresh', 'get-comments'):
+            response = self.client.get(reverse(name, args=[self.post.pk]))
+            self.assertEqual(response.data['my_vote'], -1)
+            self.assertNotIn('votes', response.data)
+            comments = {c['id']: c for c in response.data['comments']}
+            self.assertEqual(comments[self.liked.pk]['my_vote'], 1)
+            self.assertIsNone(comments[self.plain.pk]['my_vote'])
+            self.assertNotIn('votes', comments[self.plain.pk])
+
+    def test_cached_payload_is_per_user(self):
+        url = reverse('post-refresh', args=[self.post.pk])
+        self.client.get(url)
+        self.client.force_authenticate(self.other)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertIsNone(response.data['my_vote'])
+
+    def test_expand_votes_keeps_voter_list(self):
+        url = reverse('post-refresh', args=[self.post.pk]) + '?expand=votes'
+        response = self.client.get(url)
+        self.assertEqual(
+            response.data['votes'], [{'user_id': self.user.pk, 'value': -1}]
+        )
+        self.assertEqual(len(response.data['comments'][1]['votes']), 1)
+
+    def test_lists(self):
+        response = self.client.get(reverse('get-posts'))
+        self.assertEqual(response.data['results'][0]['my_vote'], -1)
+
+        response = self.client.get(reverse('comment-thread', args=[self.post.pk]))
+        self.assertEqual([c['my_vote'] for c in response.data['results']], [1, None])
+
+        response = self.client.get(reverse('comment-refresh', args=[self.liked.pk]))
+        self.assertEqual(response.data['my_vote'], 1)
+
+        response = self.client.get(
+            reverse('user-activity', args=[self.other.username]) + '?mode=stream'
+        )
+        self.assertEqual(
+            [entry['item']['my_vote'] for entry in response.data['results']],
+            [None, 1, -1],
+        )
+
+    def test_vote_toggle_is_reflected(self):
+        url = reverse('post-refresh', args=[self.post.pk])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('vote-on-post', args=[self.post.pk]),
+                {'vote_type': None},
+                format='json',
+            )
+        self.assertIsNone(self.client.get(url).data['my_vote'])
+
+    def test_vote_response(self):
+        response = self.client.post(
+            reverse('vote-on-comment', args=[self.post.pk, self.plain.pk]),
+            {'vote_type': -1},
+            format='json',
+        )
+        self.assertEqual(response.data['my_vote'], -1)
+        self.assertEqual(response.data['total_votes'], 0)
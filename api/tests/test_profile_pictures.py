@@ -0,0 +1,147 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APITestCase
+from ..images import process_profile_picture
+from ..models import UserProfile
+
+User = get_user_model()
+
+
+def image_upload(size=(300, 200), image_format='PNG', name='me.png'):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class ProfilePictureTest(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings = override_settings(
+            MEDIA_ROOT=self.media, BACKGROUND_WORKERS=0
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user(username='me', password='testpass')
+        self.client.force_authenticate(self.user)
+
+    def upload(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(
+                reverse('edit-user', args=[self.user.pk]),
+                {'profile_picture': upload},
+                format='multipart',
+            )
+
+    def profile_data(self):
+        profile = self.user.userprofile
+        return self.client.get(reverse('get-profile', args=[profile.pk])).data
+
+    def test_upload_is_resized_into_variants(self):
+        response = self.upload(image_upload(size=(2000, 1000)))
+        self.assertEqual(response.status_code, 200)
+
+        data = self.profile_data()
+        self.assertEqual(data['profile_picture_status'], 'ready')
+        self.assertEqual(
+            set(data['profile_picture_urls']), {'small', 'medium', 'large'}
+        )
+        self.assertTrue(data['profile_picture_urls']['small'].startswith('http'))
+
+        profile = UserProfile.objects.get(user=self.user)
+        for name, edge in (('small', 64), ('medium', 256), ('large', 512)):
+            with default_storage.open(profile.profile_picture_variants[name]) as f:
+                image = Image.open(f)
+                self.assertEqual((image.format, image.size), ('JPEG', (edge, edge)))
+        # The original is re-encoded and capped as well
+        with profile.profile_picture.open() as f:
+            self.assertEqual(Image.open(f).size, (1024, 512))
+
+    def test_replacing_removes_previous_files(self):
+        self.upload(image_upload())
+        first = UserProfile.objects.get(user=self.user)
+        old_files = [
+            first.profile_picture.name,
+            *first.profile_picture_variants.values(),
+        ]
+
+        self.upload(image_upload(name='new.png'))
+        for name in old_files:
+            self.assertFalse(default_storage.exists(name))
+        profile = UserProfile.objects.get(user=self.user)
+        small = profile.profile_picture_variants['small']
+        self.assertTrue(default_storage.exists(small))
+
+    def test_processing_happens_after_the_request(self):
+        response = self.client.patch(
+            reverse('edit-user', args=[self.user.pk]),
+            {'profile_picture': image_upload(), 'bio': 'Hi'},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 200)
+        # Nothing rendered until the request's transaction commits
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual(profile.bio, 'Hi')
+        self.assertEqual(profile.profile_picture_status, 'pending')
+        self.assertEqual(profile.profile_picture_variants, {})
+
+    def test_stale_job_cleans_up(self):
+        self.upload(image_upload())
+        profile = UserProfile.objects.get(user=self.user)
+        before = set(default_storage.listdir('profiles')[1])
+        # A job for an upload that has since been replaced
+        default_storage.save('profiles/stale.png', image_upload())
+        process_profile_picture(profile.pk, 'profiles/stale.png')
+        self.assertEqual(
+            set(default_storage.listdir('profiles')[1]), before | {'stale.png'}
+        )
+        profile.refresh_from_db()
+        self.assertEqual(profile.profile_picture_status, 'ready')
+
+    def test_invalid_uploads(self):
+        cases = [
+            SimpleUploadedFile('x.png', b'not an image'),
+            image_upload(image_format='BMP', name='x.bmp'),
+        ]
+        for upload in cases:
+            with self.subTest(upload=upload.name):
+                response = self.upload(upload)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('profile_picture', response.data)
+
+        with self.settings(PROFILE_PICTURE_MAX_UPLOAD_SIZE=100):
+            self.assertEqual(self.upload(image_upload()).status_code, 400)
+        with self.settings(PROFILE_PICTURE_MAX_PIXELS=100):
+            self.assertEqual(self.upload(image_upload()).status_code, 400)
+        self.assertFalse(UserProfile.objects.filter(user=self.user).exists())
+
+    def test_corrupt_image_is_marked_failed(self):
+        profile = UserProfile.objects.create(user=self.user)
+        name = default_storage.save('profiles/broken.png', image_upload())
+        with default_storage.open(name, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n' + b'\0' * 100)
+        UserProfile.objects.filter(pk=profile.pk).update(profile_picture=name)
+        with self.assertLogs('api.images', 'ERROR'):
+            process_profile_picture(profile.pk, name)
+        profile.refresh_from_db()
+        self.assertEqual(profile.profile_picture_status, 'failed')
+
+    def test_backfill_command(self):
+        name = default_storage.save('profiles/legacy.png', image_upload())
+        UserProfile.objects.create(user=self.user, profile_picture=name)
+        out = StringIO()
+        call_command('process_profile_pictures', stdout=out)
+        self.assertIn('Processed 1', out.getvalue())
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual(profile.profile_picture_status, 'ready')
+        self.assertFalse(default_storage.exists(name))
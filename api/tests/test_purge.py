@@ -0,0 +1,224 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from ..models import (
+    CategoryCount,
+    Comment,
+    Follow,
+    Post,
+    PurgeJob,
+    Tag,
+    TimelineEntry,
+    UserProfile,
+    Vote,
+)
+from ..timeline import follow
+
+User = get_user_model()
+
+
+@override_settings(BACKGROUND_WORKERS=0)
+class PurgeTest(APITestCase):
+    def setUp(self):
+        self.leaving = User.objects.create(username='leaving')
+        self.staying = User.objects.create(username='staying')
+        follow(self.staying, self.leaving)
+        follow(self.leaving, self.staying)
+
+        self.posts = [
+            Post.objects.create(
+                author=self.leaving,
+                title=f'Post {i}',
+                content='Body',
+                category='Tech',
+                keywords='python, django',
+            )
+            for i in range(3)
+        ]
+        self.other_post = Post.objects.create(
+            author=self.staying, title='Other', content='Body', keywords='python'
+        )
+        self.other_comment = Comment.objects.create(
+            post=self.other_post, author=self.staying, content='Mine'
+        )
+        for post in self.posts:
+            comment = Comment.objects.create(
+                post=post, author=self.staying, content='On their post'
+            )
+            Vote.objects.toggle(self.staying, Post, post.pk, 1)
+            Vote.objects.toggle(self.staying, Comment, comment.pk, -1)
+        Comment.objects.create(
+            post=self.other_post, author=self.leaving, content='Theirs'
+        )
+        Vote.objects.toggle(self.leaving, Post, self.other_post.pk, 1)
+        Vote.objects.toggle(self.leaving, Comment, self.other_comment.pk, -1)
+
+        self.client.force_authenticate(self.leaving)
+
+    def delete_user(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.delete(reverse('delete-user', args=[self.leaving.pk]))
+
+    def test_user_is_hidden_before_the_purge(self):
+        response = self.client.delete(reverse('delete-user', args=[self.leaving.pk]))
+        self.assertEqual(response.status_code, 202)
+        job = PurgeJob.objects.get(pk=response.data['purge_job'])
+        self.assertEqual((job.kind, job.status), (PurgeJob.USER, PurgeJob.PENDING))
+
+        self.assertFalse(Post.objects.filter(author=self.leaving).exists())
+        self.assertEqual(Post.all_objects.filter(author=self.leaving).count(), 3)
+        self.assertEqual(
+            list(Comment.objects.values_list('pk', flat=True)),
+            [self.other_comment.pk],
+        )
+        self.client.force_authenticate(self.staying)
+        response = self.client.get(reverse('post-refresh', args=[self.posts[0].pk]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('get-posts'))
+        self.assertEqual(
+            [post['id'] for post in response.data['results']], [self.other_post.pk]
+        )
+        response = self.client.get(reverse('get-comments', args=[self.other_post.pk]))
+        self.assertEqual(len(response.data['comments']), 1)
+        response = self.client.get(reverse('search-posts'), {'q': 'body'})
+        self.assertEqual(
+            [post['id'] for post in response.data['results']], [self.other_post.pk]
+        )
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(
+            dict(Tag.objects.values_list('name', 'post_count')),
+            {'python': 1, 'django': 0},
+        )
+        self.assertEqual(CategoryCount.objects.get(name='Tech').post_count, 0)
+
+        # Tokens of the deactivated account stop working
+        self.client.force_authenticate(None)
+        token = AccessToken.for_user(self.leaving)
+        response = self.client.get(
+            reverse('get-posts'), HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_purge_user(self):
+        response = self.delete_user()
+        self.assertEqual(response.status_code, 202)
+
+        self.assertFalse(User.objects.filter(pk=self.leaving.pk).exists())
+        self.assertEqual(list(Post.all_objects.all()), [self.other_post])
+        self.assertEqual(list(Comment.all_objects.all()), [self.other_comment])
+        # No votes are left behind on the removed posts and comments
+        self.assertFalse(Vote.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        self.other_post.refresh_from_db()
+        self.other_comment.refresh_from_db()
+        self.assertEqual((self.other_post.upvote_count, self.other_post.score), (0, 0))
+        self.assertEqual(
+            (self.other_comment.downvote_count, self.other_comment.score), (0, 0)
+        )
+        self.assertEqual(
+            dict(Tag.objects.values_list('name', 'post_count')),
+            {'python': 1, 'django': 0},
+        )
+        self.assertEqual(CategoryCount.objects.get(name='Tech').post_count, 0)
+        profile = UserProfile.objects.get(user=self.staying)
+        self.assertEqual((profile.followers_count, profile.following_count), (0, 0))
+
+        job = PurgeJob.objects.get(pk=response.data['purge_job'])
+        self.assertEqual(job.status, PurgeJob.DONE)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(
+            job.progress,
+            {
+                'post': 3,
+                'comment': 4,
+                'vote': 8,
+                'follow': 2,
+                'timeline_entry': 4,
+                'user': 2,
+            },
+        )
+
+    @override_settings(PURGE_CHUNK_SIZE=1)
+    def test_purge_in_small_chunks(self):
+        # The request costs the same few statements however big the account
+        with self.assertNumQueries(13):
+            response = self.client.delete(
+                reverse('delete-user', args=[self.leaving.pk])
+            )
+        job_id = response.data['purge_job']
+        call_command('purge_deleted', stdout=StringIO())
+        self.assertEqual(PurgeJob.objects.get(pk=job_id).status, PurgeJob.DONE)
+        self.assertEqual(Post.all_objects.count(), 1)
+        self.assertEqual(Vote.objects.count(), 0)
+
+    def test_failed_job_resumes(self):
+        with mock.patch('api.purge.unlink_posts', side_effect=RuntimeError('boom')):
+            with self.assertLogs('api.purge', 'ERROR'):
+                response = self.delete_user()
+        job = PurgeJob.objects.get(pk=response.data['purge_job'])
+        self.assertEqual(job.status, PurgeJob.FAILED)
+        self.assertIn('boom', job.error)
+        # What the first chunk removed before the failure stays removed
+        self.assertEqual(
+            job.progress, {'comment': 3, 'vote': 6, 'timeline_entry': 3}
+        )
+
+        out = StringIO()
+        call_command('purge_deleted', stdout=out)
+        self.assertIn('Ran 1 purge jobs, 0 failed.', out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual(job.status, PurgeJob.DONE)
+        self.assertEqual(job.progress['vote'], 8)
+        self.assertFalse(User.objects.filter(pk=self.leaving.pk).exists())
+
+    def test_cannot_delete_someone_else(self):
+        response = self.client.delete(reverse('delete-user', args=[self.staying.pk]))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(PurgeJob.objects.exists())
+
+    def test_purge_post(self):
+        post = self.posts[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('delete-post', args=[post.pk]))
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Post.all_objects.filter(pk=post.pk).exists())
+        self.assertFalse(Comment.all_objects.filter(post=post).exists())
+        self.assertEqual(Vote.objects.count(), 6)
+        self.assertEqual(Tag.objects.get(name='django').post_count, 2)
+        self.assertEqual(
+            PurgeJob.objects.get(pk=response.data['purge_job']).progress,
+            {'comment': 1, 'vote': 2, 'timeline_entry': 1, 'post': 1},
+        )
+        self.assertEqual(
+            self.client.delete(reverse('delete-post', args=[post.pk])).status_code,
+            404,
+        )
+
+    def test_deleted_post_leaves_counts_before_the_purge(self):
+        # The job never runs here: no on_commit callbacks are executed
+        self.client.delete(reverse('delete-post', args=[self.posts[0].pk]))
+        self.assertEqual(Tag.objects.get(name='django').post_count, 2)
+        self.assertEqual(CategoryCount.objects.get(name='Tech').post_count, 2)
+        # Deleting the soft-deleted row through the ORM does not count it twice
+        Post.all_objects.get(pk=self.posts[0].pk).delete()
+        self.assertEqual(Tag.objects.get(name='django').post_count, 2)
+
+    def test_job_progress_is_staff_only(self):
+        response = self.client.delete(reverse('delete-user', args=[self.leaving.pk]))
+        url = reverse('purge-job', args=[response.data['purge_job']])
+        self.client.force_authenticate(self.staying)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.staying.is_staff = True
+        self.staying.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], PurgeJob.PENDING)
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ..models import Post, Comment, Vote, UserProfile
+
+User = get_user_model()
+
+
+class ReadEndpointQueryCountTest(APITestCase):
+    """
+    Every read endpoint must cost the same number of queries whether it
+    renders one post/comment/vote or many. Each test measures an endpoint on
+    a minimal dataset, then on datasets grown along each of the N (posts),
+    M (comments per post) and K (votes per object) axes.
+    """
+
+    SMALL = (1, 1, 1)
+    GROWN = {'posts': (4, 1, 1), 'comments': (1, 4, 1), 'votes': (1, 1, 4)}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        UserProfile.objects.create(user=self.author, bio='Bio')
+        self.client.force_authenticate(self.author)
+
+    def seed(self, posts, comments, votes):
+        Post.objects.all().delete()
+        Vote.objects.all().delete()
+        User.objects.exclude(pk=self.author.pk).delete()
+
+        voters = User.objects.bulk_create(
+            User(username=f'voter{i}') for i in range(votes)
+        )
+        post_type = ContentType.objects.get_for_model(Post)
+        comment_type = ContentType.objects.get_for_model(Comment)
+        created = []
+        for _ in range(posts):
+            post = Post.objects.create(author=self.author, title='Post', content='Body')
+            created.append(post)
+            Vote.objects.bulk_create(
+                Vote(user=voter, content_type=post_type, object_id=post.id, value=1)
+                for voter in voters
+            )
+            for _ in range(comments):
+                comment = Comment.objects.create(
+                    post=post, author=self.author, content='Comment'
+                )
+                Vote.objects.bulk_create(
+                    Vote(
+                        user=voter,
+                        content_type=comment_type,
+                        object_id=comment.id,
+                        value=-1,
+                    )
+                    for voter in voters
+                )
+        Vote.objects.rebuild_counters(Post)
+        Vote.objects.rebuild_counters(Comment)
+        return created[0]
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(context)
+
+    def assertConstantQueries(self, make_url):
+        baseline = self.count_queries(make_url(self.seed(*self.SMALL)))
+        for axis, size in self.GROWN.items():
+            with self.subTest(grown=axis):
+                url = make_url(self.seed(*size))
+                self.assertEqual(self.count_queries(url), baseline)
+
+    def test_get_posts(self):
+        self.assertConstantQueries(lambda post: reverse('get-posts'))
+
+    def test_get_posts_expanded(self):
+        self.assertConstantQueries(
+            lambda post: reverse('get-posts') + '?expand=comments,votes'
+        )
+
+    def test_create_post_list(self):
+        self.assertConstantQueries(lambda post: reverse('create-post'))
+
+    def test_refresh_post(self):
+        self.assertConstantQueries(lambda post: reverse('post-refresh', args=[post.id]))
+
+    def test_get_comments(self):
+        self.assertConstantQueries(lambda post: reverse('get-comments', args=[post.id]))
+
+    def test_refresh_comment(self):
+        self.assertConstantQueries(
+            lambda post: reverse('comment-refresh', args=[post.comments.first().id])
+        )
+
+    def test_user_activity(self):
+        self.assertConstantQueries(
+            lambda post: reverse('user-activity', args=[self.author.username])
+        )
+
+    def test_user_activity_stream(self):
+        self.assertConstantQueries(
+            lambda post: reverse('user-activity', args=[self.author.username])
+            + '?mode=stream&expand=votes'
+        )
+
+    def test_get_profile(self):
+        self.assertConstantQueries(
+            lambda post: reverse('get-profile', args=[self.author.userprofile.pk])
+        )
+
+    def test_comment_thread(self):
+        self.assertConstantQueries(
+            lambda post: reverse('comment-thread', args=[post.id]) + '?expand=votes'
+        )
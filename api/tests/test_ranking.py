@@ -0,0 +1,87 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from ..models import Post, Vote
+from ..ranking import controversy, hot
+
+User = get_user_model()
+
+
+class RankingFormulaTest(APITestCase):
+    def test_hot_prefers_newer_posts_with_equal_score(self):
+        now = timezone.now()
+        self.assertGreater(hot(10, now), hot(10, now - timedelta(days=1)))
+
+    def test_hot_is_logarithmic_in_score(self):
+        now = timezone.now()
+        self.assertAlmostEqual(hot(100, now) - hot(10, now), 1, places=5)
+        self.assertLess(hot(-10, now), hot(0, now))
+
+    def test_controversy(self):
+        self.assertEqual(controversy(10, 0), 0)
+        self.assertGreater(controversy(10, 10), controversy(19, 1))
+
+
+class PostSortTest(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.voters = User.objects.bulk_create(
+            User(username=f'voter{i}') for i in range(4)
+        )
+        self.client.force_authenticate(self.author)
+        self.popular = self.make_post('popular', days_old=1, votes=[1, 1, 1, 1])
+        self.split = self.make_post('split', days_old=1, votes=[1, 1, -1, -1])
+        self.fresh = self.make_post('fresh', days_old=0, votes=[])
+        self.disliked = self.make_post('disliked', days_old=0, votes=[-1, -1, -1])
+
+    def make_post(self, title, days_old, votes):
+        post = Post.objects.create(author=self.author, title=title, content='Body')
+        Post.objects.filter(pk=post.pk).update(
+            created_at=timezone.now() - timedelta(days=days_old)
+        )
+        # A vote toggled on and off still refreshes the ranking from the
+        # backdated created_at
+        Vote.objects.toggle(self.author, Post, post.pk, 1)
+        Vote.objects.toggle(self.author, Post, post.pk, None)
+        for voter, value in zip(self.voters, votes):
+            Vote.objects.toggle(voter, Post, post.pk, value)
+        return post
+
+    def titles(self, sort):
+        titles, url = [], f"{reverse('get-posts')}?sort={sort}&page_size=1"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            titles.extend(post['title'] for post in response.data['results'])
+            url = response.data['next']
+        return titles
+
+    def test_sorts(self):
+        self.assertEqual(self.titles('new'), ['disliked', 'fresh', 'split', 'popular'])
+        self.assertEqual(self.titles('top'), ['popular', 'fresh', 'split', 'disliked'])
+        self.assertEqual(self.titles('hot')[:2], ['fresh', 'disliked'])
+        self.assertEqual(self.titles('controversial')[0], 'split')
+
+    def test_invalid_sort(self):
+        response = self.client.get(reverse('get-posts') + '?sort=random')
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_votes_refresh_rankings(self):
+        before = Post.objects.get(pk=self.popular.pk).hot_score
+        self.client.post(
+            reverse('vote-batch'),
+            {'votes': [{'target': 'post', 'id': self.popular.pk, 'vote_type': 1}]},
+            format='json',
+        )
+        self.assertGreater(Post.objects.get(pk=self.popular.pk).hot_score, before)
+
+    def test_refresh_command(self):
+        Post.objects.update(hot_score=0, controversy=0)
+        call_command('refresh_rankings', stdout=StringIO())
+        self.assertEqual(self.titles('controversial')[0], 'split')
+        self.assertEqual(self.titles('hot')[0], 'fresh')
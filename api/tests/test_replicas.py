@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITransactionTestCase
+from ..models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=60)
+class ReplicaRoutingTest(APITransactionTestCase):
+    """
+    The primary is the test database and the replica the second one the
+    settings declare for the test suite, which nothing replicates to, so
+    which rows a response contains tells which database it was read from.
+    Not a TestCase: reads inside its per-test transaction would all go to
+    the primary.
+    """
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='reader')
+        # The same user exists on both databases; the posts differ
+        User.objects.using('replica').create(pk=self.user.pk, username='reader')
+        self.primary_post = Post.objects.create(
+            author=self.user, title='Primary', content='Body'
+        )
+        self.replica_post_id = self.primary_post.pk + 1
+        Post.objects.using('replica').bulk_create(
+            [Post(pk=self.replica_post_id, author_id=self.user.pk, title='Replica')]
+        )
+        self.client.force_authenticate(self.user)
+
+    def titles(self):
+        response = self.client.get(reverse('get-posts'))
+        return [post['title'] for post in response.data['results']]
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.titles(), ['Replica'])
+        url = reverse('post-refresh', args=[self.replica_post_id])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        url = reverse('post-refresh', args=[self.primary_post.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_outside_requests_use_the_primary(self):
+        titles = Post.objects.values_list('title', flat=True)
+        self.assertEqual(list(titles), ['Primary'])
+
+    def test_writer_reads_their_writes(self):
+        # The write and the reads it makes itself go to the primary
+        response = self.client.post(
+            reverse('vote-on-post', args=[self.primary_post.pk]),
+            {'vote_type': 1},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Post.objects.get(pk=self.primary_post.pk).score, 1)
+
+        self.assertEqual(self.titles(), ['Primary'])
+        url = reverse('post-refresh', args=[self.primary_post.pk])
+        self.assertEqual(self.client.get(url).data['total_votes'], 1)
+
+        # Other users keep reading from the replica
+        other = User.objects.create(username='other')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.titles(), ['Replica'])
+
+    def test_edit_pins_to_primary(self):
+        response = self.client.patch(
+            reverse('post-update', args=[self.primary_post.pk]),
+            {'title': 'Edited'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.titles(), ['Edited'])
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        self.client.post(
+            reverse('vote-on-post', args=[self.primary_post.pk]),
+            {'vote_type': 1},
+            format='json',
+        )
+        self.assertEqual(self.titles(), ['Replica'])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.titles(), ['Primary'])
@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ..models import Post
+from ..search import search_post_ids
+
+User = get_user_model()
+
+
+class PostSearchTest(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.client.force_authenticate(self.author)
+        self.in_title = Post.objects.create(
+            author=self.author, title='Django performance', content='Tips'
+        )
+        self.in_content = Post.objects.create(
+            author=self.author,
+            title='Weekly notes',
+            content='Profiling a django view',
+        )
+        self.unrelated = Post.objects.create(
+            author=self.author, title='Gardening', content='Tomatoes', keywords='soil'
+        )
+
+    def search(self, query, **params):
+        return self.client.get(reverse('search-posts'), {'q': query, **params})
+
+    def ids(self, response):
+        return [post['id'] for post in response.data['results']]
+
+    def test_matches_are_ranked_by_relevance(self):
+        response = self.search('django')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ids(response), [self.in_title.pk, self.in_content.pk])
+        ranks = [post['rank'] for post in response.data['results']]
+        self.assertGreater(ranks[0], ranks[1])
+
+    def test_all_words_must_match_and_last_is_a_prefix(self):
+        self.assertEqual(self.ids(self.search('django perf')), [self.in_title.pk])
+        self.assertEqual(self.ids(self.search('django tomatoes')), [])
+
+    def test_stemming_and_keywords(self):
+        self.assertEqual(self.ids(self.search('profiled')), [self.in_content.pk])
+        self.assertEqual(self.ids(self.search('soil')), [self.unrelated.pk])
+
+    def test_query_syntax_is_not_interpreted(self):
+        response = self.search('django" OR (NEAR')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ids(response), [])
+
+    def test_missing_query_is_rejected(self):
+        self.assertEqual(self.search('  ').status_code, 400)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.in_title.title = 'Flask performance'
+        self.in_title.save()
+        Post.objects.filter(pk=self.unrelated.pk).update(content='Django in the garden')
+        self.in_content.delete()
+
+        self.assertEqual(
+            [post_id for post_id, _ in search_post_ids('django', 10)],
+            [self.unrelated.pk],
+        )
+        self.assertEqual(self.ids(self.search('flask')), [self.in_title.pk])
+
+    def test_pagination(self):
+        Post.objects.bulk_create(
+            Post(author=self.author, title=f'Django {i}', content='Body')
+            for i in range(3)
+        )
+        first = self.search('django', page_size=2)
+        self.assertEqual(len(first.data['results']), 2)
+        self.assertIsNone(first.data['previous'])
+
+        seen = self.ids(first)
+        response = self.client.get(first.data['next'])
+        while True:
+            seen += self.ids(response)
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_out_of_range_page(self):
+        self.assertEqual(self.search('django', page=0).status_code, 404)
+        self.assertEqual(self.search('django', page='x').status_code, 404)
@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ..models import CategoryCount, Post, Tag
+from ..tags import parse_keywords
+
+User = get_user_model()
+
+
+class TaggingTest(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+
+    def counts(self, model):
+        return dict(
+            model.objects.filter(post_count__gt=0).values_list('name', 'post_count')
+        )
+
+    def test_parse_keywords(self):
+        self.assertEqual(
+            parse_keywords(' Django,  web  dev,django,, API '),
+            ['django', 'web dev', 'api'],
+        )
+        self.assertEqual(parse_keywords(''), [])
+
+    def test_counts_follow_create_update_and_delete(self):
+        first = Post.objects.create(
+            author=self.author,
+            title='One',
+            content='Body',
+            category='Tech',
+            keywords='python, django',
+        )
+        second = Post.objects.create(
+            author=self.author,
+            title='Two',
+            content='Body',
+            category='Tech',
+            keywords='python',
+        )
+        self.assertEqual(self.counts(Tag), {'python': 2, 'django': 1})
+        self.assertEqual(self.counts(CategoryCount), {'Tech': 2})
+        self.assertEqual(
+            sorted(first.tags.values_list('name', flat=True)), ['django', 'python']
+        )
+
+        first.keywords = 'django, rest'
+        first.category = 'Web'
+        first.save()
+        self.assertEqual(self.counts(Tag), {'python': 1, 'django': 1, 'rest': 1})
+        self.assertEqual(self.counts(CategoryCount), {'Tech': 1, 'Web': 1})
+
+        second.delete()
+        self.assertEqual(self.counts(Tag), {'django': 1, 'rest': 1})
+        self.assertEqual(self.counts(CategoryCount), {'Web': 1})
+
+    def test_saving_other_fields_leaves_tags_alone(self):
+        post = Post.objects.create(
+            author=self.author, title='One', content='Body', keywords='python'
+        )
+        post.title = 'Renamed'
+        with self.assertNumQueries(1):
+            post.save(update_fields=['title'])
+        self.assertEqual(self.counts(Tag), {'python': 1})
+
+
+class TagFilterTest(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.client.force_authenticate(self.author)
+        self.both = self.make('Both', 'Tech', 'python, django')
+        self.python = self.make('Python', 'Tech', 'python')
+        self.django = self.make('Django', 'Web', 'django')
+        self.untagged = self.make('Plain', '', '')
+
+    def make(self, title, category, keywords):
+        return Post.objects.create(
+            author=self.author,
+            title=title,
+            content='Body',
+            category=category,
+            keywords=keywords,
+        )
+
+    def ids(self, **params):
+        response = self.client.get(reverse('get-posts'), params)
+        self.assertEqual(response.status_code, 200)
+        return {post['id'] for post in response.data['results']}
+
+    def test_category(self):
+        self.assertEqual(self.ids(category='Tech'), {self.both.pk, self.python.pk})
+
+    def test_any_tag(self):
+        self.assertEqual(
+            self.ids(tag=['python', 'django']),
+            {self.both.pk, self.python.pk, self.django.pk},
+        )
+        self.assertEqual(self.ids(tag='Python,unknown'), {self.both.pk, self.python.pk})
+
+    def test_all_tags(self):
+        self.assertEqual(self.ids(tag='python,django', tag_mode='all'), {self.both.pk})
+        self.assertEqual(self.ids(tag='python,unknown', tag_mode='all'), set())
+
+    def test_category_and_tag(self):
+        self.assertEqual(self.ids(category='Web', tag='django'), {self.django.pk})
+
+    def test_invalid_filters(self):
+        url = reverse('get-posts')
+        response = self.client.get(url, {'tag': 'a', 'tag_mode': 'some'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url, {'tag': ','.join(map(str, range(11)))})
+        self.assertEqual(response.status_code, 400)
+
+    def test_tag_cloud(self):
+        self.django.delete()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('tag-cloud'), {'limit': 1})
+        self.assertEqual(
+            response.data,
+            {
+                'categories': [{'name': 'Tech', 'post_count': 2}],
+                'tags': [{'name': 'python', 'post_count': 2}],
+            },
+        )
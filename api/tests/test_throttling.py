@@ -0,0 +1,147 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from ..models import Post
+from ..throttling import _fallback, parse_rate
+
+User = get_user_model()
+
+
+def rates(**overrides):
+    return override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                'user': '1000/min',
+                'anon': '100/min',
+                **overrides,
+            },
+        }
+    )
+
+
+class TokenBucketThrottleTest(APITestCase):
+    def setUp(self):
+        for buckets in (cache, _fallback):
+            buckets.clear()
+            self.addCleanup(buckets.clear)
+        self.user = User.objects.create(username='voter')
+        self.post = Post.objects.create(
+            author=self.user, title='Post', content='Body'
+        )
+        self.client.force_authenticate(self.user)
+        self.now = 1_000_000.0
+        timer = mock.patch(
+            'api.throttling.TokenBucketThrottle.timer', side_effect=lambda: self.now
+        )
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def vote(self):
+        return self.client.post(
+            reverse('vote-on-post', args=[self.post.id]),
+            {'vote_type': 1},
+            format='json',
+        )
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('60/min'), (60, 1))
+        self.assertEqual(parse_rate('5/hour'), (5, 5 / 3600))
+        self.assertEqual(parse_rate('2/s'), (2, 2))
+
+    @rates(vote='2/min')
+    def test_bucket_allows_burst_then_refills(self):
+        self.assertEqual(self.vote().status_code, 200)
+        self.assertEqual(self.vote().status_code, 200)
+        response = self.vote()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+        # One token is back after 30s, not the whole bucket
+        self.now += 30
+        self.assertEqual(self.vote().status_code, 200)
+        self.assertEqual(self.vote().status_code, 429)
+
+    @rates(vote='1/min')
+    def test_buckets_are_per_user_and_scope(self):
+        self.assertEqual(self.vote().status_code, 200)
+        self.assertEqual(self.vote().status_code, 429)
+        # Views without the scope are unaffected
+        self.assertEqual(self.client.get(reverse('get-posts')).status_code, 200)
+
+        self.client.force_authenticate(User.objects.create(username='other'))
+        self.assertEqual(self.vote().status_code, 200)
+
+    @rates(user='3/min')
+    def test_overall_limit(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(reverse('get-posts')).status_code, 200)
+        self.assertEqual(self.vote().status_code, 429)
+
+    @rates(user='3/min')
+    def test_async_views_share_the_limit(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+        self.assertEqual(self.client.get(reverse('get-posts')).status_code, 200)
+        for _ in range(2):
+            response = self.client.get(reverse('async-get-posts'))
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('async-get-posts'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+
+    @rates(anon='1/min')
+    async def test_event_stream(self):
+        url = reverse('post-events')
+        response = await self.async_client.get(url, {'posts': self.post.id})
+        self.assertEqual(response.status_code, 200)
+        await response.streaming_content.aclose()
+        response = await self.async_client.get(url, {'posts': self.post.id})
+        self.assertEqual(response.status_code, 429)
+
+    @rates(register='1/hour')
+    def test_anonymous_clients_by_ip(self):
+        self.client.force_authenticate(None)
+
+        def register(username, ip):
+            return self.client.post(
+                reverse('register'),
+                {'username': username, 'password': 'secret'},
+                REMOTE_ADDR=ip,
+            )
+
+        self.assertEqual(register('first', '10.0.0.1').status_code, 201)
+        response = register('second', '10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '3600')
+        self.assertEqual(register('third', '10.0.0.2').status_code, 201)
+
+    @rates(login='1/min')
+    def test_login_is_throttled_before_checking_the_password(self):
+        self.client.force_authenticate(None)
+        credentials = {'username': 'voter', 'password': 'wrong'}
+        self.assertEqual(
+            self.client.post(reverse('get_token'), credentials).status_code, 401
+        )
+        with mock.patch(
+            'rest_framework_simplejwt.serializers.authenticate'
+        ) as authenticate:
+            response = self.client.post(reverse('get_token'), credentials)
+        self.assertEqual(response.status_code, 429)
+        authenticate.assert_not_called()
+
+    @rates(vote='1/min')
+    def test_falls_back_to_local_memory(self):
+        broken = mock.Mock()
+        broken.get.side_effect = ConnectionError('cache down')
+        with mock.patch('api.throttling._cache', return_value=broken):
+            with self.assertLogs('api.throttling', 'WARNING'):
+                self.assertEqual(self.vote().status_code, 200)
+                self.assertEqual(self.vote().status_code, 429)
@@ -0,0 +1,141 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from ..models import Post, Follow, TimelineEntry, UserProfile
+
+User = get_user_model()
+
+
+class FollowTest(APITestCase):
+    def setUp(self):
+        self.reader = User.objects.create(username='reader')
+        self.author = User.objects.create(username='author')
+        self.client.force_authenticate(self.reader)
+        self.url = reverse('follow-user', args=[self.author.id])
+
+    def test_follow_and_unfollow(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.data, {'follower': self.reader.id, 'following': self.author.id}
+        )
+        self.assertEqual(self.client.post(self.url).status_code, 200)
+        self.assertEqual(self.author.userprofile.followers_count, 1)
+        self.assertEqual(
+            UserProfile.objects.get(user=self.reader).following_count, 1
+        )
+
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.assertEqual(self.client.delete(self.url).status_code, 404)
+        self.assertFalse(Follow.objects.exists())
+        self.author.userprofile.refresh_from_db()
+        self.assertEqual(self.author.userprofile.followers_count, 0)
+
+    def test_cannot_follow_self(self):
+        response = self.client.post(reverse('follow-user', args=[self.reader.id]))
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(TIMELINE_FANOUT_LIMIT=2, TIMELINE_BACKFILL=2)
+class HomeTimelineTest(APITestCase):
+    def setUp(self):
+        self.reader = User.objects.create(username='reader')
+        self.author = User.objects.create(username='author')
+        self.celebrity = User.objects.create(username='celebrity')
+        self.stranger = User.objects.create(username='stranger')
+        self.client.force_authenticate(self.reader)
+        self.url = reverse('home-timeline')
+
+    def post(self, author, title):
+        return Post.objects.create(author=author, title=title, content='Body')
+
+    def follow(self, user):
+        self.client.post(reverse('follow-user', args=[user.id]))
+
+    def make_celebrity(self):
+        for i in range(3):
+            fan = User.objects.create(username=f'fan{i}')
+            self.client.force_authenticate(fan)
+            self.follow(self.celebrity)
+        self.client.force_authenticate(self.reader)
+        self.follow(self.celebrity)
+
+    def titles(self, url=None):
+        titles = []
+        url = url or self.url + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            titles.extend(post['title'] for post in response.data['results'])
+            url = response.data['next']
+        return titles
+
+    def test_follow_backfills_recent_posts(self):
+        for i in range(3):
+            self.post(self.author, f'old {i}')
+        self.follow(self.author)
+        self.assertEqual(self.titles(), ['old 2', 'old 1'])
+
+    def test_fan_out_on_write(self):
+        self.follow(self.author)
+        self.post(self.author, 'new')
+        self.post(self.stranger, 'unrelated')
+        self.assertEqual(self.titles(), ['new'])
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 1)
+
+    def test_big_authors_are_merged_on_read(self):
+        self.make_celebrity()
+        self.follow(self.author)
+        self.post(self.author, 'a1')
+        self.post(self.celebrity, 'c1')
+        self.post(self.author, 'a2')
+        self.post(self.celebrity, 'c2')
+        self.assertFalse(TimelineEntry.objects.filter(post__author=self.celebrity))
+        self.assertEqual(self.titles(), ['c2', 'a2', 'c1', 'a1'])
+
+    def test_posts_in_both_sources_appear_once(self):
+        self.follow(self.celebrity)
+        self.post(self.celebrity, 'fanned out')
+        self.make_celebrity()
+        self.post(self.celebrity, 'merged on read')
+        self.assertEqual(self.titles(), ['merged on read', 'fanned out'])
+
+    def test_posts_stay_when_an_author_drops_under_the_limit(self):
+        self.make_celebrity()
+        self.post(self.celebrity, 'merged on read')
+        for fan in User.objects.filter(username__in=['fan0', 'fan1']):
+            self.client.force_authenticate(fan)
+            self.client.delete(reverse('follow-user', args=[self.celebrity.id]))
+        self.client.force_authenticate(self.reader)
+        self.post(self.celebrity, 'fanned out')
+        self.assertEqual(self.titles(), ['fanned out', 'merged on read'])
+
+        # New followers get both too
+        self.client.force_authenticate(fan)
+        self.follow(self.celebrity)
+        self.assertEqual(self.titles(), ['fanned out', 'merged on read'])
+
+    def test_unfollow_removes_posts(self):
+        self.follow(self.author)
+        self.post(self.author, 'gone')
+        self.client.delete(reverse('follow-user', args=[self.author.id]))
+        self.assertEqual(self.titles(), [])
+
+    def test_query_count_is_constant(self):
+        self.make_celebrity()
+        self.follow(self.author)
+        self.post(self.author, 'a')
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        now = timezone.now()
+        for i in range(10):
+            self.post(self.author, f'a{i}')
+            self.post(self.celebrity, f'c{i}')
+        Post.objects.update(created_at=now)
+        TimelineEntry.objects.update(created_at=now)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.url)
+        self.assertEqual(len(large), len(small))
@@ -0,0 +1,279 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ..models import Post, Comment, Vote
+from ..views import EditComment, EditPost
+
+User = get_user_model()
+
+
+class PostVoteCounterTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='voter', password='testpass')
+        self.post = Post.objects.create(
+            author=self.user, title='Test Post', content='Content'
+        )
+        self.url = reverse('vote-on-post', args=[self.post.id])
+        self.client.force_authenticate(self.user)
+
+    def vote(self, vote_type):
+        return self.client.post(self.url, {'vote_type': vote_type}, format='json')
+
+    def assertCounters(self, upvotes, downvotes):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.upvote_count, upvotes)
+        self.assertEqual(self.post.downvote_count, downvotes)
+        self.assertEqual(self.post.score, upvotes - downvotes)
+
+    def test_upvote(self):
+        response = self.vote(1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['upvotes'], 1)
+        self.assertEqual(response.data['total_votes'], 1)
+        self.assertCounters(1, 0)
+
+    def test_flip(self):
+        self.vote(1)
+        response = self.vote(-1)
+        self.assertEqual(response.data['upvotes'], 0)
+        self.assertEqual(response.data['downvotes'], 1)
+        self.assertCounters(0, 1)
+        self.assertEqual(Vote.objects.get().value, -1)
+
+    def test_toggle_off(self):
+        self.vote(1)
+        response = self.vote(1)
+        self.assertEqual(response.data['total_votes'], 0)
+        self.assertCounters(0, 0)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_remove_with_null(self):
+        self.vote(-1)
+        self.vote(None)
+        self.assertCounters(0, 0)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_unknown_post(self):
+        response = self.client.post(
+            reverse('vote-on-post', args=[self.post.id + 1]),
+            {'vote_type': 1},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_vote_does_not_recount(self):
+        self.vote(1)
+        # Flip: conditional UPDATE + locking counter SELECT + UPDATE, wrapped
+        # in a savepoint because the test itself runs inside a transaction
+        with self.assertNumQueries(5):
+            self.vote(-1)
+
+    def test_invalid_vote_type(self):
+        response = self.vote(2)
+        self.assertEqual(response.status_code, 400)
+        self.assertCounters(0, 0)
+
+
+    def test_edit_keeps_concurrent_votes(self):
+        # A vote committed between loading the post or comment and saving the
+        # edit must not be overwritten with the counters that were loaded
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, content='Comment'
+        )
+        for view, url, target in (
+            (EditPost, reverse('post-update', args=[self.post.id]), self.post),
+            (
+                EditComment,
+                reverse('edit-comment', args=[self.post.id, comment.id]),
+                comment,
+            ),
+        ):
+            get_object = view.get_object
+
+            def get_object_then_vote(view_self):
+                instance = get_object(view_self)
+                Vote.objects.toggle(self.user, type(target), target.pk, 1)
+                return instance
+
+            with self.subTest(view=view.__name__), mock.patch.object(
+                view, 'get_object', get_object_then_vote
+            ):
+                response = self.client.patch(url, {'content': 'Edited'}, format='json')
+                self.assertEqual(response.status_code, 200)
+                target.refresh_from_db()
+                self.assertEqual((target.content, target.upvote_count), ('Edited', 1))
+
+
+class CommentVoteCounterTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='voter', password='testpass')
+        self.post = Post.objects.create(
+            author=self.user, title='Test Post', content='Content'
+        )
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, content='Comment'
+        )
+        self.url = reverse('vote-on-comment', args=[self.post.id, self.comment.id])
+        self.client.force_authenticate(self.user)
+
+    def test_flip_and_toggle_off(self):
+        self.client.post(self.url, {'vote_type': -1}, format='json')
+        response = self.client.post(self.url, {'vote_type': 1}, format='json')
+        self.assertEqual(response.data['upvotes'], 1)
+        self.assertEqual(response.data['downvotes'], 0)
+
+        response = self.client.post(self.url, {'vote_type': 1}, format='json')
+        self.assertEqual(response.data['total_votes'], 0)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.score, 0)
+
+        # The post counters are independent of its comments' votes
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.upvote_count, 0)
+
+
+    def test_comment_of_another_post(self):
+        other = Post.objects.create(author=self.user, title='Other', content='Body')
+        response = self.client.post(
+            reverse('vote-on-comment', args=[other.id, self.comment.id]),
+            {'vote_type': 1},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Vote.objects.exists())
+
+
+class RebuildVoteCountsTest(APITestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'user{i}', password='testpass')
+            for i in range(3)
+        ]
+        self.post = Post.objects.create(
+            author=self.users[0], title='Test Post', content='Content'
+        )
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.users[0], content='Comment'
+        )
+        post_type = ContentType.objects.get_for_model(Post)
+        comment_type = ContentType.objects.get_for_model(Comment)
+        for user, value in zip(self.users, (1, 1, -1)):
+            Vote.objects.create(
+                user=user, content_type=post_type, object_id=self.post.id, value=value
+            )
+        Vote.objects.create(
+            user=self.users[0],
+            content_type=comment_type,
+            object_id=self.comment.id,
+            value=-1,
+        )
+
+    def test_rebuild(self):
+        call_command('rebuild_vote_counts', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual(
+            (self.post.upvote_count, self.post.downvote_count, self.post.score),
+            (2, 1, 1),
+        )
+        self.assertEqual(
+            (
+                self.comment.upvote_count,
+                self.comment.downvote_count,
+                self.comment.score,
+            ),
+            (0, 1, -1),
+        )
+
+    def test_counters_need_no_queries(self):
+        call_command('rebuild_vote_counts', stdout=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(post.upvotes, 2)
+            self.assertEqual(post.downvotes, 1)
+            self.assertEqual(post.total_votes, 1)
+
+
+class BatchVoteTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='voter', password='testpass')
+        self.post = Post.objects.create(
+            author=self.user, title='Test Post', content='Content'
+        )
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, content='Comment'
+        )
+        self.url = reverse('vote-batch')
+        self.client.force_authenticate(self.user)
+
+    def batch(self, *operations):
+        return self.client.post(
+            self.url,
+            {
+                'votes': [
+                    {'target': target, 'id': object_id, 'vote_type': vote_type}
+                    for target, object_id, vote_type in operations
+                ]
+            },
+            format='json',
+        )
+
+    def test_matches_sequential_toggles(self):
+        Vote.objects.toggle(self.user, Comment, self.comment.id, 1)
+        response = self.batch(
+            ('post', self.post.id, 1),
+            ('post', self.post.id, -1),  # flip
+            ('comment', self.comment.id, 1),  # toggle off the stored upvote
+            ('comment', self.comment.id, -1),
+        )
+        self.assertEqual(response.status_code, 200)
+        results = {(r['target'], r['id']): r for r in response.data['results']}
+        self.assertEqual(results[('post', self.post.id)]['vote_type'], -1)
+        self.assertEqual(results[('post', self.post.id)]['downvotes'], 1)
+        self.assertEqual(results[('comment', self.comment.id)]['total_votes'], -1)
+
+        self.post.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual((self.post.upvote_count, self.post.downvote_count), (0, 1))
+        self.assertEqual(
+            (self.comment.upvote_count, self.comment.downvote_count), (0, 1)
+        )
+        self.assertEqual(
+            sorted(Vote.objects.values_list('object_id', 'value')),
+            sorted([(self.post.id, -1), (self.comment.id, -1)]),
+        )
+
+    def test_removal_and_missing_targets(self):
+        Vote.objects.toggle(self.user, Post, self.post.id, 1)
+        response = self.batch(('post', self.post.id, None), ('post', 9999, 1))
+        self.assertEqual(response.data['missing'], [{'target': 'post', 'id': 9999}])
+        self.assertEqual(response.data['results'][0]['total_votes'], 0)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        posts = [
+            Post.objects.create(author=self.user, title=f'Post {i}', content='Body')
+            for i in range(10)
+        ]
+        other = Comment.objects.create(post=self.post, author=self.user, content='2')
+
+        with CaptureQueriesContext(connection) as small:
+            self.batch(('post', self.post.id, 1), ('comment', self.comment.id, -1))
+        with CaptureQueriesContext(connection) as large:
+            self.batch(
+                ('comment', other.id, 1), *(('post', post.id, 1) for post in posts)
+            )
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(Vote.objects.count(), 13)
+
+    def test_invalid_operation(self):
+        response = self.batch(('user', self.user.id, 1))
+        self.assertEqual(response.status_code, 400)
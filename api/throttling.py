@@ -0,0 +1,138 @@
+"""
+Token-bucket throttles. A rate such as ``'60/min'`` allows bursts of up to
+60 requests and refills the bucket at 60 tokens per minute. Each bucket is a
+single ``(tokens, updated_at)`` cache entry, read and written once per
+check, in the THROTTLE_CACHE_ALIAS cache so all workers share it. While that
+cache is unreachable the checks fall back to a per-process local-memory
+cache rather than failing the request or letting it through unchecked.
+
+The read-then-write is not atomic, so concurrent requests from one client
+can overdraw a bucket by a few tokens; the limits are there to stop abuse,
+not to meter exactly.
+"""
+
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import JsonResponse
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_fallback = LocMemCache('throttle-fallback', {'OPTIONS': {'MAX_ENTRIES': 10_000}})
+
+
+def parse_rate(rate):
+    """Return ``(capacity, tokens per second)`` for a ``'<n>/<period>'`` rate."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+def _cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+
+def take_token(key, capacity, refill_rate, now):
+    """
+    Take a token from the bucket ``key``. Returns 0 if one was available,
+    otherwise the seconds until the next one is.
+    """
+    try:
+        return _take(_cache(), key, capacity, refill_rate, now)
+    except Exception:
+        logger.warning(
+            'Throttle cache unavailable, using local memory', exc_info=True
+        )
+        return _take(_fallback, key, capacity, refill_rate, now)
+
+
+def _take(cache, key, capacity, refill_rate, now):
+    tokens, updated_at = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+    if tokens < 1:
+        return (1 - tokens) / refill_rate
+    # An untouched bucket is full again after capacity / refill_rate seconds
+    cache.set(key, (tokens - 1, now), capacity / refill_rate)
+    return 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class: subclasses pick the rate's scope and the client identity
+    through ``get_scope()`` and ``get_cache_key()``. Rates come from
+    REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']; a scope without one is not
+    throttled.
+    """
+
+    timer = time.time
+
+    def get_scope(self, request, view):
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view, scope):
+        ident = request.user.pk if request.user.is_authenticated else None
+        if ident is None:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'throttle:{scope}:{ident}'
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        if rate is None:
+            return True
+        capacity, refill_rate = parse_rate(rate)
+        key = self.get_cache_key(request, view, scope)
+        self.wait_time = take_token(key, capacity, refill_rate, self.timer())
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class ClientThrottle(TokenBucketThrottle):
+    """Overall limit per user (scope ``user``) or anonymous IP (``anon``)."""
+
+    def get_scope(self, request, view):
+        return 'user' if request.user.is_authenticated else 'anon'
+
+
+class ScopedThrottle(TokenBucketThrottle):
+    """Per-client limit for views that set a ``throttle_scope``."""
+
+    def get_scope(self, request, view):
+        return getattr(view, 'throttle_scope', None)
+
+
+def _check_throttles(request, view):
+    durations = []
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, view):
+            durations.append(throttle.wait())
+    return durations
+
+
+async def acheck_throttles(request, view=None):
+    """
+    Apply the default throttle classes to an async view outside DRF, the way
+    APIView.check_throttles() does. Returns None if the request may go on,
+    otherwise the 429 response to send.
+    """
+    durations = await sync_to_async(_check_throttles)(request, view)
+    if not durations:
+        return None
+    exc = Throttled(max((d for d in durations if d is not None), default=None))
+    response = JsonResponse({'detail': exc.detail}, status=exc.status_code)
+    if exc.wait is not None:
+        response['Retry-After'] = str(exc.wait)
+    return response
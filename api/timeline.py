@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Follow, Post, TimelineEntry, UserProfile
+
+
+def _fanout_limit():
+    return getattr(settings, 'TIMELINE_FANOUT_LIMIT', 5000)
+
+
+def _backfill_size():
+    return getattr(settings, 'TIMELINE_BACKFILL', 50)
+
+
+def _adjust_counts(follower_id, following_id, delta):
+    for user_id in (follower_id, following_id):
+        UserProfile.objects.get_or_create(user_id=user_id)
+    UserProfile.objects.filter(user_id=following_id).update(
+        followers_count=F('followers_count') + delta
+    )
+    UserProfile.objects.filter(user_id=follower_id).update(
+        following_count=F('following_count') + delta
+    )
+
+
+def is_fanned_out(author_id):
+    """
+    Whether the author's new posts are fanned out; those of authors with more
+    followers than the limit are merged in on read instead.
+    """
+    followers = (
+        UserProfile.objects.filter(user_id=author_id)
+        .values_list('followers_count', flat=True)
+        .first()
+    )
+    return (followers or 0) <= _fanout_limit()
+
+
+def follow(follower, following):
+    """
+    Make ``follower`` follow ``following`` and copy the author's recent posts
+    into the follower's timeline. Returns False if they already followed.
+    """
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(
+            follower=follower, following=following
+        )
+        if not created:
+            return False
+        _adjust_counts(follower.pk, following.pk, 1)
+
+        # Posts that were not fanned out reach the timeline on read
+        recent = Post.objects.filter(author=following, fanned_out=True).order_by(
+            '-created_at', '-id'
+        )[: _backfill_size()]
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(user=follower, post_id=post_id, created_at=created_at)
+                for post_id, created_at in recent.values_list('id', 'created_at')
+            ),
+            ignore_conflicts=True,
+        )
+    return True
+
+
+def unfollow(follower, following):
+    """Undo follow(). Returns False if ``follower`` did not follow them."""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            follower=follower, following=following
+        ).delete()
+        if not deleted:
+            return False
+        _adjust_counts(follower.pk, following.pk, -1)
+        TimelineEntry.objects.filter(user=follower, post__author=following).delete()
+    return True
+
+
+def fan_out_post(post):
+    """
+    Push a new post into its author's followers' timelines (fan-out on
+    write) and mark it ``fanned_out``. Posts of authors above
+    TIMELINE_FANOUT_LIMIT followers are left unmarked and merged into
+    timelines on read, even after the author drops back under the limit.
+    """
+    if not is_fanned_out(post.author_id):
+        return
+    Post.all_objects.filter(pk=post.pk).update(fanned_out=True)
+    post.fanned_out = True
+    followers = Follow.objects.filter(following_id=post.author_id).values_list(
+        'follower_id', flat=True
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, created_at=post.created_at)
+            for user_id in followers.iterator(chunk_size=1000)
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def timeline_sources(user):
+    """
+    Return the two keyset sources of ``user``'s home timeline as
+    ``(created_at, post_id)`` querysets: the materialized entries and the
+    posts of followed authors that were not fanned out (fan-out on read).
+    Each post is in exactly one of them.
+    """
+    materialized = TimelineEntry.objects.filter(user=user).values_list(
+        'created_at', 'post_id'
+    )
+    unmaterialized = Post.objects.filter(
+        author__in=Follow.objects.filter(follower=user).values('following'),
+        fanned_out=False,
+    ).values_list('created_at', 'id')
+    return materialized, unmaterialized
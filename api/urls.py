@@ -1,20 +1,32 @@
 from django.urls import path
 
+from . import async_views
 from .views import (
     UserActivityView,
     GetPosts,
+    SearchPosts,
+    TagCloudView,
+    post_events,
     RefreshPost,
     CreatePost,
     PostVoteView,
     DeleteAllPosts,
     GetComments,
+    CommentThreadView,
     CreateComment,
+    RefreshComment,
     CommentVoteView,
+    BatchVoteView,
     EditComment,
     DeleteComment,
     DeletePost,
     EditPost,
     GetProfile,
+    PostCacheStatsView,
+    PurgeJobView,
+    ExportView,
+    FollowView,
+    HomeTimelineView,
 )
 
 urlpatterns = [
@@ -28,11 +40,21 @@ urlpatterns = [
     path('post/create/', CreatePost.as_view(), name='create-post'),
     path('post/<int:post_id>/update/', EditPost.as_view(), name='post-update'),
     path('posts/', GetPosts.as_view(), name='get-posts'),
+    path('posts/search/', SearchPosts.as_view(), name='search-posts'),
+    path('tags/', TagCloudView.as_view(), name='tag-cloud'),
+    path('posts/events/', post_events, name='post-events'),
     path('posts/<int:pk>/', RefreshPost.as_view(), name='post-refresh'),
     path('comments/<int:pk>/', GetComments.as_view(), name='get-comments'),
+    path(
+        'posts/<int:post_id>/comments/',
+        CommentThreadView.as_view(),
+        name='comment-thread',
+    ),
     path(
         'comments/<int:post_id>/create/', CreateComment.as_view(), name='create-comment'
     ),
+    path('votes/batch/', BatchVoteView.as_view(), name='vote-batch'),
+    path('comment/<int:pk>/', RefreshComment.as_view(), name='comment-refresh'),
     path(
         'comments/<int:post_id>/<int:comment_id>/vote/',
         CommentVoteView.as_view(),
@@ -50,4 +72,18 @@ urlpatterns = [
     ),
     path('post/<int:pk>/delete/', DeletePost.as_view(), name='delete-post'),
     path('profile/<int:pk>', GetProfile.as_view(), name='get-profile'),
+    path('users/<int:user_id>/follow/', FollowView.as_view(), name='follow-user'),
+    path('timeline/', HomeTimelineView.as_view(), name='home-timeline'),
+    path('cache/stats/', PostCacheStatsView.as_view(), name='post-cache-stats'),
+    path('purge-jobs/<int:pk>/', PurgeJobView.as_view(), name='purge-job'),
+    path('export/', ExportView.as_view(), name='export'),
+    # Async (ASGI-native) versions of the read-heavy endpoints above
+    path('async/posts/', async_views.get_posts, name='async-get-posts'),
+    path('async/posts/<int:pk>/', async_views.get_post, name='async-post-refresh'),
+    path('async/comments/<int:pk>/', async_views.get_post, name='async-get-comments'),
+    path(
+        'async/user-activity/<str:username>/',
+        async_views.user_activity,
+        name='async-user-activity',
+    ),
 ]
@@ -2,26 +2,56 @@ from django.contrib.auth.models import User
 from rest_framework import generics, status
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.contrib.contenttypes.models import ContentType
 from rest_framework.permissions import (
     IsAuthenticated,
     AllowAny,
+    IsAdminUser,
     IsAuthenticatedOrReadOnly,
 )
 from django.db.models import Prefetch
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.views import APIView
 from django.middleware.csrf import get_token
-from django.http import Http404, JsonResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
 from .serializers import (
     UserSerializer,
     PostSerializer,
+    PostSummarySerializer,
     CommentSerializer,
+    CommentSummarySerializer,
+    ThreadCommentSerializer,
     CustomTokenSerializer,
     UserProfileSerializer,
+    BatchVoteSerializer,
+    FollowSerializer,
+    PurgeJobSerializer,
+    VoteOperationSerializer,
+    attach_my_votes,
+    parse_expand,
 )
-from .models import Post, Comment, Vote, UserProfile
-from rest_framework.exceptions import NotFound
+from .models import Post, Comment, Vote, UserProfile, PurgeJob
+from .pagination import (
+    KeysetPagination,
+    MergedKeysetPagination,
+    RankedPagination,
+    UnionKeysetPagination,
+)
+from .search import search_post_ids
+from .tags import MAX_FILTER_TAGS, filter_posts, parse_keywords, tag_cloud
+from .timeline import follow, timeline_sources, unfollow
+from .cache import cache_stats, get_post_payload, invalidate_post, post_version
+from .images import replace_profile_picture, validate_upload
+from .purge import delete_post, delete_user
+from .export import aexport_lines, export_lines, parse_kinds
+from .throttling import acheck_throttles
+from .events import format_event, get_broker, publish_event, vote_event_data
+from rest_framework.exceptions import NotFound, PermissionDenied
 
 
 def csrf_token_view(request):
@@ -31,12 +61,15 @@ def csrf_token_view(request):
 
 class CustomTokenView(TokenObtainPairView):
     serializer_class = CustomTokenSerializer
+    # Checked before the password is hashed
+    throttle_scope = 'login'
 
 
 class CreateUserView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'register'
 
     def perform_create(self, serializer):
         # First, create the user using the serializer
@@ -57,6 +90,11 @@ class EditUserView(generics.UpdateAPIView):
         return self.request.user
 
     def perform_update(self, serializer):
+        # Reject a bad picture before anything is written
+        upload = self.request.FILES.get('profile_picture')
+        if upload is not None:
+            validate_upload(upload)
+
         # Update the user details
         user = serializer.save()
 
@@ -65,22 +103,84 @@ class EditUserView(generics.UpdateAPIView):
 
         # Optionally, update the UserProfile's bio and profile_picture
         user_profile.bio = self.request.data.get('bio', user_profile.bio)
-        user_profile.profile_picture = self.request.data.get(
-            'profile_picture', user_profile.profile_picture
-        )
-        user_profile.save()
+        if upload is not None:
+            # Only the upload is stored here; resizing runs on the image
+            # worker pool (see api/images.py)
+            replace_profile_picture(user_profile, upload)
+        else:
+            user_profile.save()
 
         return user  # Return the updated user object
 
 
 class DeleteUserView(generics.DestroyAPIView):
-    queryset = User.objects.all()
+    queryset = User.objects.filter(is_active=True)
     permission_classes = [IsAuthenticated]
     lookup_field = 'pk'
 
-    def perform_destroy(self, instance):
-        # Optional: You can add extra actions before deleting the user (e.g., logging or sending a notification)
-        instance.delete()
+    def destroy(self, request, *args, **kwargs):
+        user = self.get_object()
+        if user.pk != request.user.pk and not request.user.is_staff:
+            return Response(
+                {"detail": "You do not have permission to delete this user."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        # The account disappears now; its rows are purged in the background
+        # (see api/purge.py)
+        job = delete_user(user)
+        return Response(
+            {"message": "User deleted.", "purge_job": job.pk},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class PurgeJobView(generics.RetrieveAPIView):
+    """Progress of the background purge behind a user or post deletion."""
+
+    queryset = PurgeJob.objects.all()
+    serializer_class = PurgeJobSerializer
+    permission_classes = [IsAdminUser]
+
+
+class ExportView(APIView):
+    """
+    Streams posts, comments and votes as NDJSON for analytics (see
+    api/export.py); `?types=post,vote` narrows it down and `?since=` takes
+    the X-Export-Watermark of the previous export. Rows are streamed as they
+    are read, from an async generator under ASGI.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            kinds = parse_kinds(request.query_params.get('types', ''))
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        since = request.query_params.get('since')
+        if since:
+            # An unencoded '+' of the UTC offset arrives as a space
+            since = parse_datetime(since.replace(' ', '+'))
+            if since is None:
+                return Response(
+                    {"error": "Query parameter 'since' must be an ISO 8601 datetime"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        watermark = timezone.now()
+        # ASGI would drain a synchronous iterator into memory first
+        if isinstance(request._request, ASGIRequest):
+            lines = aexport_lines
+        else:
+            lines = export_lines
+        response = StreamingHttpResponse(
+            lines(kinds, since or None), content_type='application/x-ndjson'
+        )
+        response['X-Export-Watermark'] = watermark.isoformat()
+        return response
 
 
 ### Clear database:
@@ -97,66 +197,320 @@ class DeleteAllPosts(APIView):
 
 
 ### New Codes:
+def comment_queryset():
+    """Comments with everything CommentSerializer renders loaded up front."""
+    return (
+        Comment.objects.select_related('author', 'post')
+        .prefetch_related('votes')
+        .order_by('created_at', 'id')
+    )
+
+
+def post_detail_queryset():
+    """Posts with everything PostSerializer renders, comments included."""
+    return Post.objects.select_related('author').prefetch_related(
+        'votes', Prefetch('comments', queryset=comment_queryset())
+    )
+
+
+def post_list_queryset(expand=()):
+    """
+    Posts annotated for PostSummarySerializer, prefetching only the nested
+    data that was asked for through `?expand=`.
+    """
+    posts = Post.objects.select_related('author').with_comments_count()
+    if 'votes' in expand:
+        posts = posts.prefetch_related('votes')
+    if 'comments' in expand:
+        posts = posts.prefetch_related(
+            Prefetch('comments', queryset=comment_queryset())
+        )
+    return posts
+
+
 class UserActivityView(APIView):
     permission_classes = [IsAuthenticated]
 
+    # Query building and rendering are shared with the async activity view
+
+    @staticmethod
+    def sources(request, username):
+        expand = parse_expand(request)
+        posts = post_list_queryset(expand).filter(author__username=username)
+        comments = comment_queryset().filter(author__username=username)
+        if 'votes' not in expand:
+            comments = comments.prefetch_related(None)
+        return posts, comments, {'request': request, 'expand': expand}
+
+    @staticmethod
+    def stream_data(paginator, page, context):
+        """Render a stream page; returns ``(data, posts, comments)``."""
+        serializer_for = {
+            'post': PostSummarySerializer(context=context),
+            'comment': CommentSummarySerializer(context=context),
+        }
+        data = paginator.get_paginated_data(
+            [
+                {
+                    'type': kind,
+                    'item': serializer_for[kind].to_representation(obj),
+                }
+                for kind, obj in page
+            ]
+        )
+        items = {'post': [], 'comment': []}
+        for entry in data['results']:
+            items[entry['type']].append(entry['item'])
+        return data, items['post'], items['comment']
+
+    @staticmethod
+    def split_data(post_paginator, post_page, comment_paginator, comment_page, context):
+        """Render separate post and comment pages; see stream_data()."""
+        data = {
+            "posts": post_paginator.get_paginated_data(
+                PostSummarySerializer(post_page, many=True, context=context).data
+            ),
+            "comments": comment_paginator.get_paginated_data(
+                CommentSummarySerializer(comment_page, many=True, context=context).data
+            ),
+        }
+        return data, data['posts']['results'], data['comments']['results']
+
+    @staticmethod
+    def split_paginators():
+        return (
+            KeysetPagination(cursor_query_param='posts_cursor'),
+            KeysetPagination(cursor_query_param='comments_cursor'),
+        )
+
     def get(self, request, username):
-        user = User.objects.filter(username=username).first()
-        if not user:
+        posts, comments, context = self.sources(request, username)
+
+        if request.query_params.get('mode') == 'stream':
+            # One time-ordered stream of posts and comments
+            paginator = MergedKeysetPagination()
+            page = paginator.paginate_querysets(
+                {'post': posts, 'comment': comments}, request, view=self
+            )
+            data, post_items, comment_items = self.stream_data(
+                paginator, page, context
+            )
+            empty = not page
+        else:
+            # Posts and comments paginated independently
+            post_paginator, comment_paginator = self.split_paginators()
+            post_page = post_paginator.paginate_queryset(posts, request, view=self)
+            comment_page = comment_paginator.paginate_queryset(
+                comments, request, view=self
+            )
+            data, post_items, comment_items = self.split_data(
+                post_paginator, post_page, comment_paginator, comment_page, context
+            )
+            empty = not post_page and not comment_page
+        attach_my_votes(request.user, posts=post_items, comments=comment_items)
+
+        # Only an empty page needs to tell "no activity" from "no such user"
+        if empty and not User.objects.filter(username=username).exists():
             return Response({"error": "User not found"}, status=404)
 
-        posts = Post.objects.filter(author=user).order_by('-created_at')
-        comments = (
-            Comment.objects.filter(author=user)
-            .select_related('post')
-            .order_by('-created_at')
-        )  # Optimize with select_related
+        return Response(data)
 
-        post_serializer = PostSerializer(posts, many=True)
-        comment_serializer = CommentSerializer(comments, many=True)
 
-        return Response(
-            {
-                "posts": post_serializer.data,
-                "comments": comment_serializer.data,
-            }
+class GetPosts(APIView):
+    pagination_class = KeysetPagination
+    # Each sort is a keyset over a stored, indexed column (see Post.Meta)
+    sort_orderings = {
+        'new': ('-created_at', '-id'),
+        'hot': ('-hot_score', '-id'),
+        'top': ('-score', '-id'),
+        'controversial': ('-controversy', '-id'),
+    }
+
+    @classmethod
+    def feed_query(cls, request):
+        """
+        Validate the feed's query parameters and return ``(posts, ordering,
+        expand)``; raises ValueError with a message for the client. Shared
+        with the async feed view.
+        """
+        params = request.GET
+        sort = params.get('sort', 'new')
+        if sort not in cls.sort_orderings:
+            raise ValueError(
+                "Invalid sort. Must be one of: " + ", ".join(cls.sort_orderings)
+            )
+        tag_mode = params.get('tag_mode', 'any')
+        if tag_mode not in ('any', 'all'):
+            raise ValueError("Invalid tag_mode. Must be one of: any, all")
+        # ?tag=a&tag=b and ?tag=a,b are equivalent
+        tags = parse_keywords(','.join(params.getlist('tag')))
+        if len(tags) > MAX_FILTER_TAGS:
+            raise ValueError(f"At most {MAX_FILTER_TAGS} tags can be filtered on")
+
+        # Only what the summary serializer touches is loaded, so a page costs
+        # the same few queries however many posts, comments and votes exist
+        expand = parse_expand(request)
+        posts = filter_posts(
+            post_list_queryset(expand),
+            category=params.get('category'),
+            tags=tags,
+            match_all=tag_mode == 'all',
+        )
+        return posts, cls.sort_orderings[sort], expand
+
+    def get(self, request):
+        try:
+            posts, ordering, expand = self.feed_query(request)
+        except ValueError as error:
+            return Response(
+                {"error": str(error)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator = self.pagination_class(ordering=ordering)
+        page = paginator.paginate_queryset(posts, request, view=self)
+        serializer = PostSummarySerializer(
+            page, many=True, context={'request': request, 'expand': expand}
         )
+        attach_my_votes(request.user, posts=serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
 
-class GetPosts(APIView):
+class TagCloudView(APIView):
+    default_limit = 50
+    max_limit = 200
+
     def get(self, request):
-        # Prefetch the votes for each post to ensure they load with the query
-        posts = Post.objects.prefetch_related(
-            Prefetch('votes', queryset=Vote.objects.all(), to_attr='post_votes_set')
-        ).all()
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+        return Response(tag_cloud(limit))
 
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class SearchPosts(APIView):
+    pagination_class = RankedPagination
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {"error": "Query parameter 'q' is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # The full-text index picks and ranks one page of ids; only those
+        # posts are then loaded, in rank order
+        expand = parse_expand(request)
+        paginator = self.pagination_class()
+        page = paginator.paginate_results(
+            lambda limit, offset: search_post_ids(query, limit, offset), request
+        )
+        ranks = dict(page)
+        posts = post_list_queryset(expand).in_bulk(ranks)
+        serializer = PostSummarySerializer(
+            [posts[post_id] for post_id in ranks if post_id in posts],
+            many=True,
+            context={'request': request, 'expand': expand},
+        )
+        for item in serializer.data:
+            item['rank'] = ranks[item['id']]
+        attach_my_votes(request.user, posts=serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class CreatePost(generics.ListCreateAPIView):
-    queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        return post_list_queryset(parse_expand(self.request))
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return PostSummarySerializer
+        return PostSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = parse_expand(self.request)
+        return context
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        attach_my_votes(request.user, posts=response.data)
+        return response
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
 
-class RefreshPost(generics.RetrieveAPIView):
-    queryset = Post.objects.prefetch_related(
-        Prefetch('votes', queryset=Vote.objects.all(), to_attr='post_votes_set')
-    ).all()
+def detail_variant(request):
+    """The cached payload variant requested through `?expand=votes`."""
+    return ','.join(sorted(parse_expand(request) & {'votes'}))
+
+
+def detail_etag(request, token, variant):
+    # The payload carries the requesting user's my_vote, and their own votes
+    # bump the version, so the validator is per user and variant
+    return quote_etag(f'{token}-{request.user.pk or 0}-{variant}')
+
+
+def set_detail_headers(response, etag, modified_at, hit):
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified_at)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class CachedPostRetrieveMixin:
+    """
+    Serve the full post representation from the per-post cache, building it
+    from the database only on a miss. See api/cache.py for invalidation.
+
+    The post's cache version doubles as ETag/Last-Modified, so polling
+    clients that send If-None-Match/If-Modified-Since get a 304 without a
+    single database query.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        post_id = self.kwargs['pk']
+        variant = detail_variant(request)
+        version = post_version(post_id)
+        token, modified_at = version
+        etag = detail_etag(request, token, variant)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=int(modified_at)
+        )
+        if not_modified is not None:
+            return not_modified
+
+        data, hit = get_post_payload(
+            post_id,
+            lambda: self.get_serializer(self.get_object()).data,
+            version=version,
+            variant=variant,
+        )
+        attach_my_votes(request.user, posts=[data])
+        response = Response(data, status=status.HTTP_200_OK)
+        return set_detail_headers(response, etag, modified_at, hit)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = parse_expand(self.request) & {'votes'}
+        return context
+
+
+class RefreshPost(CachedPostRetrieveMixin, generics.RetrieveAPIView):
+    queryset = post_detail_queryset()
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
-    def get(self, request, *args, **kwargs):
-        post = self.get_object()
-        serializer = self.get_serializer(post)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
 
 class PostVoteView(generics.GenericAPIView):
+    throttle_scope = 'vote'
+
     def post(self, request, post_id):
         vote_type = request.data.get('vote_type')
 
@@ -169,71 +523,145 @@ class PostVoteView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Get the post object
-        post = get_object_or_404(Post, id=post_id)
-
-        # Get the ContentType for the Post model
-        content_type = ContentType.objects.get_for_model(Post)
-
-        # Check if the user already voted on this post
+        # One conditional write plus the counter update in a single
+        # transaction; an unknown post rolls everything back
         try:
-            vote = Vote.objects.get(
-                user=request.user, content_type=content_type, object_id=post_id
+            my_vote, counters = Vote.objects.toggle(
+                request.user, Post, post_id, vote_type
             )
-            if vote_type is None:
-                # If vote_type is None, delete the vote
-                vote.delete()
-            else:
-                # Update the vote if it differs from the current value
-                if vote.value != vote_type:
-                    vote.value = vote_type
-                    vote.save()
-                else:
-                    # If the vote is the same, delete it (toggle off)
-                    vote.delete()
-        except Vote.DoesNotExist:
-            # Create a new vote if one doesn't exist and vote_type is not None
-            if vote_type is not None:
-                Vote.objects.create(
-                    user=request.user,
-                    content_type=content_type,
-                    object_id=post_id,
-                    value=vote_type,
-                )
-
-        # Update and calculate total votes
-        post_total_votes = post.total_votes
+        except Post.DoesNotExist:
+            raise Http404
+        invalidate_post(post_id)
+        publish_event(post_id, 'vote', vote_event_data('post', post_id, counters))
 
         return Response(
             {
                 "message": "Vote toggled successfully.",
-                "upvotes": post.upvotes,
-                "downvotes": post.downvotes,
-                "total_votes": post_total_votes,
+                "upvotes": counters['upvote_count'],
+                "downvotes": counters['downvote_count'],
+                "total_votes": counters['score'],
+                "my_vote": my_vote,
             },
             status=status.HTTP_200_OK,
         )
 
 
-class GetComments(generics.RetrieveAPIView):
-    queryset = Post.objects.prefetch_related(
-        'votes',
-        'comments__votes',
-    ).all()
+class GetComments(CachedPostRetrieveMixin, generics.RetrieveAPIView):
+    queryset = post_detail_queryset()
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
+class CommentThreadView(APIView):
+    """
+    One keyset page of a post's comments; unlike GetComments, the cost of a
+    page does not depend on the size of the thread.
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    # Each sort is a keyset over the (post, ...) indexes in Comment.Meta
+    sort_orderings = {
+        'oldest': ('created_at', 'id'),
+        'newest': ('-created_at', '-id'),
+        'top': ('-score', '-id'),
+    }
+
+    def get(self, request, post_id):
+        sort = request.query_params.get('sort', 'oldest')
+        if sort not in self.sort_orderings:
+            return Response(
+                {
+                    "error": "Invalid sort. Must be one of: "
+                    + ", ".join(self.sort_orderings)
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        expand = parse_expand(request) & {'votes'}
+        comments = Comment.objects.filter(post_id=post_id).select_related('author')
+        if 'votes' in expand:
+            comments = comments.prefetch_related('votes')
+
+        paginator = self.pagination_class(ordering=self.sort_orderings[sort])
+        page = paginator.paginate_queryset(comments, request, view=self)
+        if not page and not Post.objects.filter(pk=post_id).exists():
+            raise Http404
+        serializer = ThreadCommentSerializer(
+            page, many=True, context={'request': request, 'expand': expand}
+        )
+        attach_my_votes(request.user, comments=serializer.data)
+        return paginator.get_paginated_response(serializer.data)
+
+
+MAX_EVENT_POSTS = 50
+
+
+async def post_events(request):
+    """
+    Server-sent event stream of `vote` (absolute counts of a post or one of
+    its comments) and `comment` (new comment) events for the posts listed
+    in `?posts=1,2,3`, replacing polling of RefreshPost/RefreshComment.
+    Holds a connection per client, so it needs the ASGI application: WSGI
+    servers would drain the endless stream before sending anything.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": "Event streams are only served by the ASGI application"},
+            status=501,
+        )
+    throttled = await acheck_throttles(request)
+    if throttled is not None:
+        return throttled
+    try:
+        post_ids = {int(pk) for pk in request.GET.get('posts', '').split(',') if pk}
+    except ValueError:
+        post_ids = set()
+    if not post_ids or len(post_ids) > MAX_EVENT_POSTS:
+        return JsonResponse(
+            {
+                "error": "Query parameter 'posts' must list between 1 and "
+                f"{MAX_EVENT_POSTS} post ids"
+            },
+            status=400,
+        )
+    heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT', 15)
+
+    async def stream():
+        # Subscribe on the loop that consumes the stream
+        broker = get_broker()
+        subscription = broker.subscribe(post_ids)
+        try:
+            yield f'retry: {int(heartbeat * 1000)}\n\n'
+            while True:
+                event = await subscription.get(heartbeat)
+                # A comment line keeps proxies from closing an idle stream
+                yield ': keepalive\n\n' if event is None else format_event(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 class CreateComment(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = CommentSerializer
+    throttle_scope = 'comment'
 
     def perform_create(self, serializer):
         post = get_object_or_404(Post, id=self.kwargs['post_id'])
-        serializer.save(author=self.request.user, post=post)
+        comment = serializer.save(author=self.request.user, post=post)
+        publish_event(
+            post.pk, 'comment', {'comment': ThreadCommentSerializer(comment).data}
+        )
 
 
 class CommentVoteView(generics.GenericAPIView):
+    throttle_scope = 'vote'
+
     def post(self, request, post_id, comment_id):
         vote_type = request.data.get('vote_type')
 
@@ -246,59 +674,102 @@ class CommentVoteView(generics.GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Get the post object
-        post = get_object_or_404(Post, id=post_id)
+        # The comment must belong to the post; otherwise nothing is written
+        try:
+            my_vote, counters = Vote.objects.toggle(
+                request.user, Comment, comment_id, vote_type, post_id=post_id
+            )
+        except Comment.DoesNotExist:
+            raise Http404
+        invalidate_post(post_id)
+        publish_event(
+            post_id, 'vote', vote_event_data('comment', comment_id, counters)
+        )
+
+        return Response(
+            {
+                "message": "Vote toggled successfully.",
+                "upvotes": counters['upvote_count'],
+                "downvotes": counters['downvote_count'],
+                "total_votes": counters['score'],
+                "my_vote": my_vote,
+            },
+            status=status.HTTP_200_OK,
+        )
+
 
-        # Try to get the comment
-        comment = get_object_or_404(post.comments.all(), id=comment_id)
+class BatchVoteView(generics.GenericAPIView):
+    serializer_class = BatchVoteSerializer
+    throttle_scope = 'vote'
 
-        # The content type is always for the Comment model, no reply logic needed
-        content_type = ContentType.objects.get_for_model(Comment)
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        # Check if the user already voted on this comment
-        try:
-            vote = Vote.objects.get(
-                user=request.user, content_type=content_type, object_id=comment_id
+        # Same toggle semantics as PostVoteView/CommentVoteView, applied in
+        # order with a handful of set-based queries in one transaction
+        targets = VoteOperationSerializer.TARGETS
+        names = {model: name for name, model in targets.items()}
+        operations = [
+            (targets[op['target']], op['id'], op['vote_type'])
+            for op in serializer.validated_data['votes']
+        ]
+        results, missing = Vote.objects.toggle_many(request.user, operations)
+
+        post_of = {(Post, oid): oid for model, oid in results if model is Post}
+        comment_ids = [oid for model, oid in results if model is Comment]
+        if comment_ids:
+            post_of.update(
+                ((Comment, pk), post_id)
+                for pk, post_id in Comment.objects.filter(
+                    pk__in=comment_ids
+                ).values_list('pk', 'post_id')
+            )
+        invalidate_post(*set(post_of.values()))
+        for (model, object_id), (_, counters) in results.items():
+            publish_event(
+                post_of[model, object_id],
+                'vote',
+                vote_event_data(names[model], object_id, counters),
             )
-            if vote_type is None:
-                vote.delete()  # Delete vote if vote_type is None (toggle off)
-            else:
-                if vote.value != vote_type:
-                    vote.value = vote_type
-                    vote.save()
-                else:
-                    vote.delete()  # Toggle off if the same vote is submitted again
-        except Vote.DoesNotExist:
-            if vote_type is not None:
-                Vote.objects.create(
-                    user=request.user,
-                    content_type=content_type,
-                    object_id=comment_id,
-                    value=vote_type,
-                )
 
         return Response(
             {
-                "message": "Vote toggled successfully.",
-                "upvotes": comment.upvotes,
-                "downvotes": comment.downvotes,
-                "total_votes": comment.total_votes,
+                "results": [
+                    {
+                        "target": names[model],
+                        "id": object_id,
+                        "vote_type": value,
+                        "upvotes": counters['upvote_count'],
+                        "downvotes": counters['downvote_count'],
+                        "total_votes": counters['score'],
+                    }
+                    for (model, object_id), (value, counters) in results.items()
+                ],
+                "missing": [
+                    {"target": names[model], "id": object_id}
+                    for model, object_id in missing
+                ],
             },
             status=status.HTTP_200_OK,
         )
 
 
 class RefreshComment(generics.RetrieveAPIView):
-    queryset = Comment.objects.prefetch_related(
-        Prefetch('votes', queryset=Vote.objects.all(), to_attr='post_votes_set')
-    ).all()
+    queryset = comment_queryset()
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get(self, request, *args, **kwargs):
         comment = self.get_object()
-        serializer = self.get_serializer(comment)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        data = self.get_serializer(comment).data
+        attach_my_votes(request.user, comments=[data])
+        return Response(data, status=status.HTTP_200_OK)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = parse_expand(self.request) & {'votes'}
+        return context
 
 
 class EditComment(generics.UpdateAPIView):
@@ -313,11 +784,13 @@ class EditComment(generics.UpdateAPIView):
         comment = get_object_or_404(Comment, id=comment_id, post__id=post_id)
 
         # Optional: Check if the request user is the author of the comment
-        if comment.author != self.request.user:
+        if comment.author_id != self.request.user.pk:
             self.permission_denied(
                 self.request, message="You do not have permission to edit this comment."
             )
 
+        # The author is the requesting user; don't fetch it again to render it
+        comment.author = self.request.user
         return comment
 
     def update(self, request, *args, **kwargs):
@@ -345,7 +818,7 @@ class DeleteComment(generics.DestroyAPIView):
     def delete(self, request, *args, **kwargs):
         instance = self.get_object()
         # Check if the user is the comment's author (added for extra safety)
-        if instance.author != request.user:
+        if instance.author_id != request.user.pk:
             return Response(
                 {"detail": "You do not have permission to delete this comment."},
                 status=status.HTTP_403_FORBIDDEN,
@@ -368,18 +841,20 @@ class DeletePost(generics.DestroyAPIView):
         Ensures the post exists or raises a 404 error.
         """
         obj = super().get_object()  # Get the object using the provided id
-        if obj.author.id != self.request.user.id:
+        if obj.author_id != self.request.user.pk:
             raise PermissionDenied('You are not authorized to delete this post.')
         return obj
 
-    def perform_destroy(self, instance):
+    def destroy(self, request, *args, **kwargs):
         """
-        Override the perform_destroy method to delete the post.
+        Soft-delete the post and its comments; their rows and votes are
+        purged in the background (see api/purge.py).
         """
-        instance.delete()
+        job = delete_post(self.get_object())
         return Response(
-            status=status.HTTP_204_NO_CONTENT
-        )  # Return a 204 No Content status after deletion
+            {"message": "Post deleted.", "purge_job": job.pk},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
 
 class EditPost(generics.UpdateAPIView):
@@ -392,11 +867,12 @@ class EditPost(generics.UpdateAPIView):
         post = self.get_object()
 
         # Check if the user is the author of the post
-        if request.user != post.author:
+        if post.author_id != request.user.pk:
             return Response(
                 {"error": "You do not have permission to edit this post."},
                 status=status.HTTP_403_FORBIDDEN,
             )
+        post.author = request.user
 
         # Proceed with the regular update logic
         serializer = self.get_serializer(post, data=request.data, partial=True)
@@ -407,6 +883,73 @@ class EditPost(generics.UpdateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class PostCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats(), status=status.HTTP_200_OK)
+
+
+class FollowView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, user_id):
+        following = get_object_or_404(User, pk=user_id)
+        if following.pk == request.user.pk:
+            return Response(
+                {"error": "You cannot follow yourself."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        created = follow(request.user, following)
+        serializer = FollowSerializer(
+            {'follower': request.user, 'following': following}
+        )
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    def delete(self, request, user_id):
+        following = get_object_or_404(User, pk=user_id)
+        if not unfollow(request.user, following):
+            return Response(
+                {"error": "You are not following this user."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class HomeTimelineView(APIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = UnionKeysetPagination
+
+    def get(self, request):
+        # Page through (created_at, post_id) keys from the fanned-out entries
+        # and the read-time merge of big authors, then load just that page
+        materialized, unmaterialized = timeline_sources(request.user)
+        paginator = self.pagination_class()
+        keys = paginator.paginate_querysets(
+            [
+                (materialized, ('-created_at', '-post_id')),
+                (unmaterialized, ('-created_at', '-id')),
+            ],
+            request,
+            model=Post,
+            view=self,
+        )
+
+        expand = parse_expand(request)
+        posts = post_list_queryset(expand).in_bulk([post_id for _, post_id in keys])
+        serializer = PostSummarySerializer(
+            [posts[post_id] for _, post_id in keys if post_id in posts],
+            many=True,
+            context={'request': request, 'expand': expand},
+        )
+        attach_my_votes(request.user, posts=serializer.data)
+        return paginator.get_paginated_response(serializer.data)
+
+
 class GetProfile(generics.RetrieveAPIView):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
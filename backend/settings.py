@@ -11,8 +11,11 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import sys
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -35,11 +38,25 @@ ALLOWED_HOSTS = ["*", "/*"]
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.auth.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Token buckets (see api/throttling.py): an overall limit per user or
+    # anonymous IP, plus the limit of the view's throttle_scope if it has one
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.ClientThrottle',
+        'api.throttling.ScopedThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '1000/min',
+        'anon': '100/min',
+        'register': '5/hour',
+        'login': '10/min',
+        'vote': '60/min',
+        'comment': '10/min',
+    },
 }
 
 SIMPLE_JWT = {
@@ -64,6 +81,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.replicas.replica_routing_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -98,13 +116,134 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+# DB_ENGINE=postgres selects PostgreSQL (configured through the POSTGRES_*
+# variables); anything else keeps the local SQLite file.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'backend'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            # Keep connections open across requests, checking them before
+            # reuse so a restarted server doesn't fail the next request
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+            },
+        }
+    }
+    # DB_POOL_MAX_SIZE > 0 shares a connection pool between the threads of a
+    # process instead. Django's pool needs psycopg 3 (psycopg[pool]) and
+    # replaces persistent connections.
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 0))
+    if DB_POOL_MAX_SIZE:
+        if find_spec('psycopg') is None or find_spec('psycopg_pool') is None:
+            raise ImproperlyConfigured(
+                'DB_POOL_MAX_SIZE requires psycopg 3: pip install "psycopg[pool]"'
+            )
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Wait for the write lock instead of failing right away with
+                # "database is locked"
+                'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+                # Take the write lock when a transaction starts, so two
+                # transactions can't both read and then deadlock upgrading
+                'transaction_mode': 'IMMEDIATE',
+                # WAL lets readers carry on while a write is in progress
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                ),
+            },
+        }
+    }
+
+# Read replicas (see api/replicas.py): DB_REPLICAS lists the hosts
+# (PostgreSQL) or files (SQLite) holding copies of the primary. Safe-method
+# requests read from them; a user who wrote reads from the primary for the
+# next REPLICA_PIN_SECONDS.
+DATABASE_REPLICAS = []
+for index, location in enumerate(filter(None, os.getenv('DB_REPLICAS', '').split(','))):
+    alias = f'replica{index + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST' if DB_ENGINE == 'postgres' else 'NAME': location.strip(),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # Tests run against the primary's test database only
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+# The test suite also gets a database that nothing replicates to, standing
+# in for a replica (api/tests/test_replicas.py routes to it). Its test
+# database is created alongside the primary's.
+if sys.argv[1:2] == ['test']:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # SQLite's in-memory test databases are already one per alias
+        'TEST': (
+            {'NAME': f"test_{DATABASES['default']['NAME']}_replica"}
+            if DB_ENGINE == 'postgres'
+            else {}
+        ),
+    }
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+# Users resolved from JWTs are cached for this long (see api/auth.py)
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+
+# Throttle buckets live in this cache; point it at a shared backend when
+# running several workers
+THROTTLE_CACHE_ALIAS = 'default'
+
+# Serialized post detail payloads (see api/cache.py)
+POST_CACHE_ALIAS = 'default'
+POST_CACHE_TIMEOUT = int(os.getenv('POST_CACHE_TIMEOUT', 300))
+# Version tokens (and so ETags) outlive the payloads; never shorter than them
+POST_CACHE_VERSION_TIMEOUT = int(os.getenv('POST_CACHE_VERSION_TIMEOUT', 3600))
+
+# Home timeline (see api/timeline.py): posts of authors with more followers
+# than the limit are merged in on read instead of fanned out on write
+TIMELINE_FANOUT_LIMIT = int(os.getenv('TIMELINE_FANOUT_LIMIT', 5000))
+TIMELINE_BACKFILL = 50
+
+# Realtime vote/comment events (see api/events.py). The default broker only
+# reaches clients of the same process; set EVENT_BROKER to a shared one when
+# running several ASGI workers
+EVENT_BROKER = os.getenv('EVENT_BROKER', 'api.events.InProcessBroker')
+EVENT_STREAM_HEARTBEAT = int(os.getenv('EVENT_STREAM_HEARTBEAT', 15))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -144,6 +283,25 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Background work (api/tasks.py) runs on a pool of BACKGROUND_WORKERS
+# threads; 0 runs it inline
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+
+# Profile picture uploads (see api/images.py), rendered in the background
+PROFILE_PICTURE_MAX_UPLOAD_SIZE = int(
+    os.getenv('PROFILE_PICTURE_MAX_UPLOAD_SIZE', 5 * 1024 * 1024)
+)
+PROFILE_PICTURE_MAX_PIXELS = 25_000_000
+PROFILE_PICTURE_MAX_EDGE = 1024
+PROFILE_PICTURE_SIZES = {'small': 64, 'medium': 256, 'large': 512}
+
+# Deleted users and posts are hidden at once and removed by a background
+# job (api/purge.py) in transactions of PURGE_CHUNK_SIZE rows
+PURGE_CHUNK_SIZE = int(os.getenv('PURGE_CHUNK_SIZE', 500))
+
+# NDJSON exports (api/export.py) fetch EXPORT_CHUNK_SIZE rows at a time
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
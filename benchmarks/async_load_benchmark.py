@@ -0,0 +1,230 @@
+"""
+Load-test the sync read views against their async counterparts under ASGI.
+
+The script migrates and seeds a scratch SQLite database, then drives the
+project's ASGI application in-process with a fixed number of concurrent
+clients, once per endpoint for the sync (/api/...) and the async
+(/api/async/...) stack, and reports requests/sec and latency percentiles.
+Driving the application directly leaves out the HTTP server, so the numbers
+compare the two Django stacks themselves.
+
+Usage:
+    python benchmarks/async_load_benchmark.py [--concurrency N] [--requests N]
+                                              [--posts N] [--comments N]
+                                              [--votes N] [--db PATH]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+# Query logging under DEBUG would dominate the timings
+os.environ['DEBUG'] = ''
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument(
+        '--requests', type=int, default=2_000, help='requests per endpoint and stack'
+    )
+    parser.add_argument('--posts', type=int, default=2_000)
+    parser.add_argument('--comments', type=int, default=20_000)
+    parser.add_argument('--votes', type=int, default=50_000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument(
+        '--db', help='SQLite file to use (default: a temporary file)', default=None
+    )
+    return parser.parse_args()
+
+
+def setup_django(db_path):
+    from django.conf import settings
+
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': db_path,
+    }
+    # One client sends every request; only the overall rate would apply
+    settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {}
+    import django
+
+    django.setup()
+
+
+def seed(args):
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from api.models import Comment, Post, Vote
+
+    started = time.perf_counter()
+    rng = random.Random(0)
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            User(username=f'user{i}', password='!') for i in range(args.users)
+        )
+        posts = Post.objects.bulk_create(
+            Post(author=rng.choice(users), title=f'Post {i}', content='Body ' * 50)
+            for i in range(args.posts)
+        )
+        comments = Comment.objects.bulk_create(
+            Comment(post=rng.choice(posts), author=rng.choice(users), content='Hi')
+            for _ in range(args.comments)
+        )
+        targets = posts + comments
+        votes = {
+            (rng.choice(users).pk, rng.choice(targets)) for _ in range(args.votes)
+        }
+        Vote.objects.bulk_create(
+            (
+                Vote(user_id=user_id, content_object=target, value=rng.choice((1, -1)))
+                for user_id, target in votes
+            ),
+            batch_size=5_000,
+        )
+    Vote.objects.rebuild_counters(Post)
+    Vote.objects.rebuild_counters(Comment)
+    print(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+
+async def request(app, url, headers):
+    """Run one GET through the ASGI app; returns the response status."""
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'benchmark')] + headers,
+        'client': ('127.0.0.1', 50000),
+        'server': ('benchmark', 80),
+    }
+    body_sent = False
+    status = None
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects; Django cancels this when it is done
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+async def load(app, urls, headers, concurrency, total):
+    """Issue ``total`` requests over ``urls`` from ``concurrency`` clients."""
+    latencies, errors = [], 0
+    remaining = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        for i in remaining:
+            started = time.perf_counter()
+            status = await request(app, urls[i % len(urls)], headers)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'errors': errors,
+    }
+
+
+def endpoints(args):
+    """``{name: (sync urls, async urls)}`` for every benchmarked endpoint."""
+    from django.urls import reverse
+
+    rng = random.Random(1)
+    post_ids = [rng.randint(1, args.posts) for _ in range(50)]
+    usernames = [f'user{rng.randrange(args.users)}' for _ in range(50)]
+
+    def both(name, params=None, query=''):
+        def urls(view):
+            if params is None:
+                return [reverse(view) + query]
+            return [reverse(view, args=[param]) + query for param in params]
+
+        return urls(name), urls(f'async-{name}')
+
+    return {
+        'feed': both('get-posts'),
+        'feed (top, expanded)': both('get-posts', query='?sort=top&expand=comments'),
+        'post detail': both('post-refresh', post_ids),
+        'user activity': both('user-activity', usernames),
+        'user activity stream': both('user-activity', usernames, '?mode=stream'),
+    }
+
+
+async def benchmark(args):
+    from django.contrib.auth.models import User
+    from django.core.asgi import get_asgi_application
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    app = get_asgi_application()
+    user = await User.objects.afirst()
+    token = str(await asyncio.to_thread(AccessToken.for_user, user))
+    headers = [(b'authorization', f'Bearer {token}'.encode())]
+
+    print(
+        f'\n{args.requests} requests per run, {args.concurrency} concurrent clients\n'
+    )
+    print(f'{"endpoint":24} {"stack":6} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9}')
+    for name, stacks in endpoints(args).items():
+        for stack, urls in zip(('sync', 'async'), stacks):
+            # Warm the per-post cache and the connection first
+            await load(app, urls, headers, 1, len(urls))
+            result = await load(app, urls, headers, args.concurrency, args.requests)
+            errors = f'  ({result["errors"]} errors)' if result['errors'] else ''
+            print(
+                f'{name:24} {stack:6} {result["rps"]:9.1f} '
+                f'{result["p50"]:9.2f} {result["p99"]:9.2f}{errors}'
+            )
+
+
+def main():
+    args = parse_args()
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+    fresh = not os.path.exists(db_path)
+    setup_django(db_path)
+
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+    if fresh:
+        seed(args)
+
+    asyncio.run(benchmark(args))
+
+
+if __name__ == '__main__':
+    main()
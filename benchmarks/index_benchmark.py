@@ -0,0 +1,283 @@
+"""
+Compare query plans and timings of the hot read queries with and without
+the composite indexes added in api/migrations/0005_access_pattern_indexes.
+
+The script migrates a scratch SQLite database, seeds it with posts,
+comments and (by default) two million votes, then runs every query with
+the indexes dropped ("before") and recreated ("after").
+
+Usage:
+    python benchmarks/index_benchmark.py [--votes N] [--posts N] [--comments N]
+                                         [--db PATH] [--repeat N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--votes', type=int, default=2_000_000)
+    parser.add_argument('--posts', type=int, default=50_000)
+    parser.add_argument('--comments', type=int, default=200_000)
+    parser.add_argument('--users', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument(
+        '--db', help='SQLite file to use (default: a temporary file)', default=None
+    )
+    return parser.parse_args()
+
+
+def setup_django(db_path):
+    from django.conf import settings
+
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': db_path,
+    }
+    import django
+
+    django.setup()
+
+
+def seed(args):
+    from django.contrib.contenttypes.models import ContentType
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from api.models import Post, Comment, Vote
+
+    post_type = ContentType.objects.get_for_model(Post)
+    comment_type = ContentType.objects.get_for_model(Comment)
+    now = timezone.now()
+    user_table = connection.ops.quote_name('auth_user')
+
+    def insert(table, columns, rows):
+        placeholders = ', '.join(['%s'] * len(columns))
+        sql = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders})'
+        with connection.cursor() as cursor:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == 10_000:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+
+    started = time.perf_counter()
+    with transaction.atomic():
+        insert(
+            user_table,
+            [
+                'id',
+                'username',
+                'password',
+                'is_superuser',
+                'is_staff',
+                'is_active',
+                'first_name',
+                'last_name',
+                'email',
+                'date_joined',
+            ],
+            (
+                (i, f'user{i}', '!', False, False, True, '', '', '', now)
+                for i in range(1, args.users + 1)
+            ),
+        )
+        insert(
+            Post._meta.db_table,
+            [
+                'id',
+                'author_id',
+                'title',
+                'content',
+                'created_at',
+                'updated_at',
+                'category',
+                'keywords',
+                'upvote_count',
+                'downvote_count',
+                'score',
+                'hot_score',
+                'controversy',
+                'fanned_out',
+            ],
+            (
+                (
+                    i,
+                    i % args.users + 1,
+                    f'Post {i}',
+                    'Body',
+                    now - timedelta(seconds=i),
+                    now,
+                    '',
+                    '',
+                    0,
+                    0,
+                    0,
+                    0,
+                    0,
+                    True,
+                )
+                for i in range(1, args.posts + 1)
+            ),
+        )
+        insert(
+            Comment._meta.db_table,
+            [
+                'id',
+                'post_id',
+                'author_id',
+                'content',
+                'created_at',
+                'updated_at',
+                'upvote_count',
+                'downvote_count',
+                'score',
+            ],
+            (
+                (
+                    i,
+                    i % args.posts + 1,
+                    i % args.users + 1,
+                    'Comment',
+                    now - timedelta(seconds=i),
+                    now,
+                    0,
+                    0,
+                    0,
+                )
+                for i in range(1, args.comments + 1)
+            ),
+        )
+
+        # Spread the votes over every post and comment; (user, target) pairs
+        # stay unique as long as votes <= users * targets
+        targets = args.posts + args.comments
+
+        def votes():
+            for i in range(args.votes):
+                target, user = i % targets, i // targets % args.users + 1
+                if target < args.posts:
+                    content_type, object_id = post_type.pk, target + 1
+                else:
+                    content_type, object_id = comment_type.pk, target - args.posts + 1
+                yield (user, content_type, object_id, 1 if i % 3 else -1, now, now)
+
+        insert(
+            Vote._meta.db_table,
+            [
+                'user_id',
+                'content_type_id',
+                'object_id',
+                'value',
+                'created_at',
+                'updated_at',
+            ],
+            votes(),
+        )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    print(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+
+def benchmark_queries(args):
+    from django.contrib.contenttypes.models import ContentType
+    from api.models import Post, Comment, Vote
+
+    post_type = ContentType.objects.get_for_model(Post)
+    middle = Post.objects.order_by('-created_at', '-id')[args.posts // 2]
+    page_ids = list(range(1, 21))
+
+    return {
+        'vote count of one post': lambda: Vote.objects.filter(
+            content_type=post_type, object_id=middle.id, value=1
+        ),
+        'votes prefetch for a page': lambda: Vote.objects.filter(
+            content_type=post_type, object_id__in=page_ids
+        ),
+        'feed first page': lambda: Post.objects.order_by('-created_at', '-id')[:21],
+        'feed deep page (seek)': lambda: Post.objects.filter(
+            created_at__lt=middle.created_at
+        ).order_by('-created_at', '-id')[:21],
+        'user activity posts': lambda: Post.objects.filter(author_id=7).order_by(
+            '-created_at', '-id'
+        )[:21],
+        'user activity comments': lambda: Comment.objects.filter(
+            author_id=7
+        ).order_by('-created_at', '-id')[:21],
+        'comment thread': lambda: Comment.objects.filter(post_id=middle.id).order_by(
+            'created_at', 'id'
+        )[:50],
+    }
+
+
+def run(queries, repeat):
+    results = {}
+    for name, make_queryset in queries.items():
+        plan = make_queryset().explain()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(make_queryset())
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = (plan, statistics.median(timings))
+    return results
+
+
+def managed_indexes():
+    from api.models import Post, Comment, Vote
+
+    return [(model, index) for model in (Post, Comment, Vote) for index in model._meta.indexes]
+
+
+def main():
+    args = parse_args()
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+    fresh = not os.path.exists(db_path)
+    setup_django(db_path)
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command('migrate', verbosity=0)
+    if fresh:
+        seed(args)
+
+    queries = benchmark_queries(args)
+
+    with connection.schema_editor() as editor:
+        for model, index in managed_indexes():
+            editor.remove_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    before = run(queries, args.repeat)
+
+    with connection.schema_editor() as editor:
+        for model, index in managed_indexes():
+            editor.add_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    after = run(queries, args.repeat)
+
+    for name in queries:
+        (plan_before, ms_before), (plan_after, ms_after) = before[name], after[name]
+        print(f'\n== {name}')
+        print(f'   before: {ms_before:9.3f} ms  {plan_before}')
+        print(f'   after:  {ms_after:9.3f} ms  {plan_after}')
+        print(f'   speedup: {ms_before / max(ms_after, 1e-6):.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Measure concurrent vote throughput on each database backend.
+
+Every backend run happens in a fresh process against a scratch database
+(created like Django's test database and dropped afterwards). Worker threads
+then cast votes through VoteManager.toggle(), just like PostVoteView does, and
+the script reports votes/sec, latency percentiles and failed votes (e.g.
+"database is locked"). Backends:
+
+    sqlite-default  SQLite with Django's default options (rollback journal,
+                    5s busy timeout, deferred transactions)
+    sqlite          SQLite as configured in backend/settings.py (WAL,
+                    IMMEDIATE transactions, longer busy timeout)
+    postgres        PostgreSQL from the POSTGRES_* environment variables
+
+Usage:
+    python benchmarks/write_benchmark.py [--backend NAME ...] [--threads N]
+                                         [--votes N] [--posts N] [--users N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ['DEBUG'] = ''
+
+BACKENDS = ('sqlite-default', 'sqlite', 'postgres')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        '--backend',
+        action='append',
+        choices=BACKENDS,
+        help='backend to run (repeatable; default: both SQLite profiles)',
+    )
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument(
+        '--votes', type=int, default=4_000, help='votes per backend run'
+    )
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--run', choices=BACKENDS, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def setup_django(backend):
+    if backend == 'postgres':
+        os.environ['DB_ENGINE'] = 'postgres'
+    else:
+        os.environ['DB_ENGINE'] = 'sqlite'
+    from django.conf import settings
+
+    database = settings.DATABASES['default']
+    if backend == 'sqlite-default':
+        database['OPTIONS'] = {}
+    if backend.startswith('sqlite'):
+        # A file, so that every thread's connection sees the same database
+        database['TEST'] = {
+            'NAME': os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+        }
+    import django
+
+    django.setup()
+
+
+def seed(args):
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from api.models import Post
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            User(username=f'user{i}', password='!') for i in range(args.users)
+        )
+        posts = Post.objects.bulk_create(
+            Post(author=users[i % len(users)], title=f'Post {i}', content='Body')
+            for i in range(args.posts)
+        )
+    return users, [post.pk for post in posts]
+
+
+def cast_votes(args, users, post_ids):
+    from django.db import close_old_connections
+    from api.models import Post, Vote
+
+    remaining = iter(range(args.votes))
+    lock = threading.Lock()
+    latencies, failures = [], []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                user, post_id = rng.choice(users), rng.choice(post_ids)
+                started = time.perf_counter()
+                try:
+                    Vote.objects.toggle(user, Post, post_id, rng.choice((1, -1)))
+                except Exception as exc:
+                    failures.append(type(exc).__name__)
+                else:
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            close_old_connections()
+
+    threads = [
+        threading.Thread(target=worker, args=(seed,)) for seed in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'votes_per_sec': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000 if latencies else 0,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+        'failed': len(failures),
+        'errors': sorted(set(failures)),
+    }
+
+
+def run(args):
+    """Benchmark ``args.run`` in this process and print one result row."""
+    setup_django(args.run)
+    from django.db import connection
+
+    test_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        users, post_ids = seed(args)
+        result = cast_votes(args, users, post_ids)
+    finally:
+        connection.creation.destroy_test_db(test_name, verbosity=0)
+    errors = f'  {", ".join(result["errors"])}' if result['errors'] else ''
+    print(
+        f'{args.run:16} {result["votes_per_sec"]:9.1f} {result["p50"]:9.2f} '
+        f'{result["p99"]:9.2f} {result["failed"]:7}{errors}',
+        flush=True,
+    )
+
+
+def main():
+    args = parse_args()
+    if args.run:
+        run(args)
+        return
+
+    print(f'{args.votes} votes per run, {args.threads} threads\n')
+    print(f'{"backend":16} {"votes/s":>9} {"p50 ms":>9} {"p99 ms":>9} {"failed":>7}')
+    for backend in args.backend or ('sqlite-default', 'sqlite'):
+        command = [sys.executable, __file__, '--run', backend]
+        for name in ('threads', 'votes', 'posts', 'users'):
+            command += [f'--{name}', str(getattr(args, name))]
+        subprocess.run(command, check=False)
+
+
+if __name__ == '__main__':
+    main()